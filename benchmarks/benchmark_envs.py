@@ -0,0 +1,38 @@
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.benchmark_settings import default_settings, create_simulation
+
+# Env backends to compare
+backends = ["Native", "Gym", "Sharded"]
+
+
+def benchmark_envs(env_id, env_copies, env_workers, steps):
+    # Load default settings
+    env_settings, train_settings, parameter_settings, other_settings = default_settings(env_id)
+    env_settings[0] = env_copies
+    env_settings[7] = env_workers
+
+    # Loop through env backends
+    for backend in backends:
+        # Change env backend
+        env_settings[6] = backend
+        print("\nEnv Backend = %s" % backend)
+        env = create_simulation(env_id, env_settings, train_settings, parameter_settings, other_settings).env
+
+        # Step env copies with random actions and time it
+        generator = np.random.default_rng(0)
+        env.reset(seed=0)
+        start_time = time.perf_counter()
+        for _ in range(steps): env.step(generator.integers(0, env.single_action_space.n, env_copies))
+        step_time = time.perf_counter() - start_time
+        print("Time = %.1fs, %.0f env steps/s" % (step_time, steps * env_copies / step_time))
+        env.close()
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.benchmark_envs [env id] [env copies] [env workers] [steps]
+    arguments = sys.argv[1:] + ["BrickBreaker-v0", 16, 4, 2000][len(sys.argv) - 1:]
+    benchmark_envs(arguments[0], int(arguments[1]), int(arguments[2]), int(arguments[3]))
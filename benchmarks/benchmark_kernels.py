@@ -0,0 +1,42 @@
+import sys
+import time
+import numpy as np
+
+from benchmarks.benchmark_settings import default_settings, create_simulation, default_hyperparameters
+
+# Kernel backends to compare
+backends = ["NumPy", "Numba"]
+
+
+def benchmark_kernels(env_id, env_copies, runs):
+    # Load default settings
+    env_settings, train_settings, parameter_settings, other_settings = default_settings(env_id)
+    env_settings[0] = env_copies
+
+    # Q-tables and results of each backend
+    q_tables = []
+    results = []
+
+    # Loop through backends
+    for backend in backends:
+        # Change kernel backend
+        env_settings[5] = backend
+        print("\nKernel Backend = %s" % backend)
+
+        # Run experiment and time it
+        env_simulation = create_simulation(env_id, env_settings, train_settings, parameter_settings, other_settings)
+        start_time = time.perf_counter()
+        results.append(env_simulation.run_experiment(default_hyperparameters, runs, True))
+        print("Time = %.1fs" % (time.perf_counter() - start_time))
+        q_tables.append(np.array(env_simulation.qLearning.tables.q_tables))
+
+    # Backends must give the same experiment
+    same_results = results[0] == results[1] and np.array_equal(q_tables[0], q_tables[1])
+    print("\nSame Q-Tables and Results = %s" % same_results)
+    return same_results
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.benchmark_kernels [env id] [env copies] [runs]
+    arguments = sys.argv[1:] + ["CartPole-v1", 5, 30][len(sys.argv) - 1:]
+    sys.exit(not benchmark_kernels(arguments[0], int(arguments[1]), int(arguments[2])))
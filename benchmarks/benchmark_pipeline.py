@@ -0,0 +1,28 @@
+import sys
+import time
+
+from benchmarks.benchmark_settings import default_settings, run_benchmark
+
+
+def benchmark_pipeline(env_id, env_copies, env_backend, env_workers, runs):
+    # Load default settings
+    env_settings, train_settings, parameter_settings, other_settings = default_settings(env_id)
+    env_settings[0] = env_copies
+    env_settings[6:8] = [env_backend, env_workers]
+
+    # Compare lockstep and pipelined stepping
+    for pipelined in [False, True]:
+        # Change stepping mode
+        env_settings[8] = pipelined
+        print("\nPipelined Stepping = %s" % pipelined)
+
+        # Run experiment and time it
+        start_time = time.perf_counter()
+        run_benchmark(env_id, env_settings, train_settings, parameter_settings, other_settings, runs)
+        print("Time = %.1fs" % (time.perf_counter() - start_time))
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.benchmark_pipeline [env id] [env copies] [env backend] [env workers] [runs]
+    arguments = sys.argv[1:] + ["BrickBreaker-v0", 8, "Sharded", 2, 8][len(sys.argv) - 1:]
+    benchmark_pipeline(arguments[0], int(arguments[1]), arguments[2], int(arguments[3]), int(arguments[4]))
@@ -0,0 +1,38 @@
+import sys
+import time
+
+from benchmarks.benchmark_settings import default_settings, create_simulation
+from code.genetic_algorithm import GeneticAlgorithm
+
+
+def benchmark_population(env_id, env_copies, population_size):
+    # Load default settings
+    env_settings, train_settings, parameter_settings, other_settings = default_settings(env_id)
+    env_settings[0] = env_copies
+
+    # Random population from genetic algorithm
+    tune_settings = [0.5, 0.1, 0.5, 0.5, population_size, 0, 1, 1]
+    population = GeneticAlgorithm(tune_settings, None, other_settings).generate_initial_population()
+
+    # Evaluate chromosomes one at a time
+    env_simulation = create_simulation(env_id, env_settings, train_settings, parameter_settings, other_settings)
+    start_time = time.perf_counter()
+    serial_results = [env_simulation.run_experiment(chromosome, env_copies, False)[0] for chromosome in population]
+    serial_time = time.perf_counter() - start_time
+
+    # Evaluate whole population in one batch
+    env_simulation.resize_env(population_size * env_copies)
+    start_time = time.perf_counter()
+    batch_results = env_simulation.evaluate_population(population, env_copies)
+    batch_time = time.perf_counter() - start_time
+
+    # Print fitness of each chromosome
+    for chromosome, serial, batch in zip(population, serial_results, batch_results):
+        print("%s: serial = %.1f, batch = %.1f" % (chromosome, sum(serial) / len(serial), sum(batch) / len(batch)))
+    print("Serial time = %.1fs, batch time = %.1fs" % (serial_time, batch_time))
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.benchmark_population [env id] [env copies] [population size]
+    arguments = sys.argv[1:] + ["CartPole-v1", 2, 10][len(sys.argv) - 1:]
+    benchmark_population(arguments[0], int(arguments[1]), int(arguments[2]))
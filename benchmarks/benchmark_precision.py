@@ -0,0 +1,30 @@
+import sys
+import time
+
+from benchmarks.benchmark_settings import default_settings, run_benchmark
+
+# Q-table precisions to compare
+precisions = ["Float64", "Float32", "Float16", "Int16"]
+
+
+def benchmark_precision(env_id, env_copies, runs):
+    # Load default settings
+    env_settings, train_settings, parameter_settings, other_settings = default_settings(env_id)
+    env_settings[0] = env_copies
+
+    # Loop through precisions
+    for precision in precisions:
+        # Change Q-table precision
+        parameter_settings[5] = precision
+        print("\nQ-Table Precision = %s" % precision)
+
+        # Run experiment and time it
+        start_time = time.perf_counter()
+        run_benchmark(env_id, env_settings, train_settings, parameter_settings, other_settings, runs)
+        print("Time = %.1fs" % (time.perf_counter() - start_time))
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.benchmark_precision [env id] [env copies] [runs]
+    arguments = sys.argv[1:] + ["CartPole-v1", 5, 30][len(sys.argv) - 1:]
+    benchmark_precision(arguments[0], int(arguments[1]), int(arguments[2]))
@@ -0,0 +1,31 @@
+import sys
+import time
+
+from benchmarks.benchmark_settings import default_settings, run_benchmark
+
+# Action repeats to compare
+repeats = [1, 2, 4]
+
+
+def benchmark_repeat(env_id, env_copies, env_backend, runs):
+    # Load default settings
+    env_settings, train_settings, parameter_settings, other_settings = default_settings(env_id)
+    env_settings[0] = env_copies
+    env_settings[6] = env_backend
+
+    # Loop through action repeats
+    for repeat in repeats:
+        # Change action repeat
+        env_settings[11] = repeat
+        print("\nAction Repeat = %d" % repeat)
+
+        # Run experiment and time it
+        start_time = time.perf_counter()
+        run_benchmark(env_id, env_settings, train_settings, parameter_settings, other_settings, runs)
+        print("Time = %.1fs" % (time.perf_counter() - start_time))
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.benchmark_repeat [env id] [env copies] [env backend] [runs]
+    arguments = sys.argv[1:] + ["BrickBreaker-v0", 4, "Sharded", 8][len(sys.argv) - 1:]
+    benchmark_repeat(arguments[0], int(arguments[1]), arguments[2], int(arguments[3]))
@@ -0,0 +1,54 @@
+from main import env_dict
+from code.env_simulation import EnvSimulation
+from code.experiment_results import Results
+
+# Default experiment hyperparameters
+default_hyperparameters = [0.9, 0.1, 0.004, 0.5, 0.01, 0.002, 0.9, 0.99, 0.001]
+
+
+def default_settings(env_id):
+    # Load env settings
+    settings = env_dict[env_id][0]().env_settings()
+
+    # Default env settings and training settings with most episodes
+    env_settings = [1, False, 20313854, "", "", "NumPy", "Native", 1, False, "", 1000, 1]
+    train_settings = [50, settings["Run"]["Episodes"][0][1], settings["Run"]["Turns"][1], 0, 0]
+
+    # Default parameter settings
+    parameters = settings["Parameter"]
+    state_space = tuple(default for _, _, default in settings["State"])
+    parameter_settings = [parameters["Q-Tables"][1], state_space, parameters["Tilings"][1], parameters["Action"][1],
+                          "None", "Float64", "None", False, parameters["Reward"][1], 0, 64, 0, 32, 1, False, 0, 1, 0, "Linear"]
+
+    # Default other settings
+    other_settings = {}
+    for _, (label, *values) in settings["Other"] or []:
+        other_settings[label.lower().replace(" ", "_")] = values[-1]
+
+    # Return settings
+    return env_settings, train_settings, parameter_settings, other_settings
+
+
+def create_simulation(env_id, env_settings, train_settings, parameter_settings, other_settings):
+    # Load env functions
+    functions = env_dict[env_id][1](parameter_settings, other_settings)
+
+    # Load reinforcement learning
+    env_simulation = EnvSimulation()
+    env_simulation.unpack_settings(train_settings, functions, other_settings)
+    env_simulation.create_env(env_id, env_settings)
+    env_simulation.create_agent(parameter_settings)
+    return env_simulation
+
+
+def run_benchmark(env_id, env_settings, train_settings, parameter_settings, other_settings, runs):
+    # Load reinforcement learning
+    env_simulation = create_simulation(env_id, env_settings, train_settings, parameter_settings, other_settings)
+
+    # Run experiment
+    results, total_runs = env_simulation.run_experiment(default_hyperparameters, runs, True)
+
+    # Compare results with original results
+    original_results = env_dict[env_id][0]().get_original_results()
+    result_settings = [0.99, original_results["Mean"], original_results["STD"], original_results["Size"]]
+    return Results(result_settings, results, total_runs).get_statistics()
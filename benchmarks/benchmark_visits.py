@@ -0,0 +1,31 @@
+import sys
+import time
+
+from benchmarks.benchmark_settings import default_settings, run_benchmark
+
+# Learning rate and exploration modes to compare
+modes = [("Schedule", False, 0), ("Visit-Count Learning", True, 0),
+         ("Exploration Bonus", False, 0.5), ("Visit-Count Learning + Exploration Bonus", True, 0.5)]
+
+
+def benchmark_visits(env_id, env_copies, runs):
+    # Load default settings
+    env_settings, train_settings, parameter_settings, other_settings = default_settings(env_id)
+    env_settings[0] = env_copies
+
+    # Loop through modes
+    for label, visit_learning, explore_bonus in modes:
+        # Change visit-count settings
+        parameter_settings[14:16] = [visit_learning, explore_bonus]
+        print("\nMode = %s" % label)
+
+        # Run experiment and time it
+        start_time = time.perf_counter()
+        run_benchmark(env_id, env_settings, train_settings, parameter_settings, other_settings, runs)
+        print("Time = %.1fs" % (time.perf_counter() - start_time))
+
+
+if __name__ == '__main__':
+    # Usage: python -m benchmarks.benchmark_visits [env id] [env copies] [runs]
+    arguments = sys.argv[1:] + ["CartPole-v1", 5, 30][len(sys.argv) - 1:]
+    benchmark_visits(arguments[0], int(arguments[1]), int(arguments[2]))
@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def get_coarse_state(num_state, coarse_factor):
+    # Divide buckets of each dimension by coarse factor
+    return tuple(int(np.ceil(buckets / coarse_factor)) for buckets in num_state)
+
+
+def upsample_grid(table, coarse_state, fine_state, interpolation):
+    # Loop through state dimensions after Q-table axis
+    for axis, (coarse_buckets, fine_buckets) in enumerate(zip(coarse_state, fine_state), 1):
+        # Position of fine bucket centres on coarse grid
+        position = np.linspace(0, coarse_buckets - 1, fine_buckets)
+
+        # Nearest coarse bucket
+        if interpolation == "Nearest":
+            table = np.take(table, np.round(position).astype(int), axis=axis)
+            continue
+
+        # Linear interpolation between neighbouring coarse buckets
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, coarse_buckets - 1)
+        shape = [1] * table.ndim
+        shape[axis] = fine_buckets
+        weight = (position - lower).reshape(shape)
+        table = np.take(table, lower, axis=axis) * (1 - weight) + np.take(table, upper, axis=axis) * weight
+
+    # Return fine Q-table
+    return table
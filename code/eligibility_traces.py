@@ -0,0 +1,60 @@
+import numpy as np
+
+# Traces below cutoff are pruned
+TRACE_CUTOFF = 0.01
+
+# Arrays of trace sets
+TRACE_ARRAYS = ["trace_tables", "trace_states", "trace_actions", "trace_values"]
+
+
+class EligibilityTraces:
+    def __init__(self, num_agents, trace_length, trace_decay, state_shape):
+        # Trace settings
+        self.trace_decay = trace_decay
+        self.agents = np.arange(num_agents)
+
+        # Bounded set of visited Q-table, state and action of each agent
+        self.trace_tables = np.zeros((num_agents, trace_length), dtype=int)
+        self.trace_states = np.zeros((num_agents, trace_length) + state_shape, dtype=int)
+        self.trace_actions = np.zeros((num_agents, trace_length), dtype=int)
+        # Empty traces have zero value
+        self.trace_values = np.zeros((num_agents, trace_length))
+
+    def clear(self, agents):
+        # Remove all traces of agents
+        self.trace_values[agents] = 0
+
+    def visit(self, tables, states, actions):
+        # Find existing traces of visited state-actions
+        same_states = (self.trace_states == states[:, None]).reshape(self.trace_values.shape + (-1,)).all(axis=-1)
+        match = (self.trace_values > 0) & (self.trace_tables == tables[:, None]) & \
+                same_states & (self.trace_actions == actions[:, None])
+        # Otherwise use empty or oldest trace
+        position = np.where(match.any(axis=1), np.argmax(match, axis=1), np.argmin(self.trace_values, axis=1))
+
+        # Replace trace with visited state-action
+        self.trace_tables[self.agents, position] = tables
+        self.trace_states[self.agents, position] = states
+        self.trace_actions[self.agents, position] = actions
+        self.trace_values[self.agents, position] = 1
+
+    def entries(self, delta):
+        # Active traces
+        agents, position = np.nonzero(self.trace_values)
+        # Return trace indices and scaled Q-value changes
+        return (agents, self.trace_tables[agents, position], self.trace_states[agents, position],
+                self.trace_actions[agents, position], delta[agents] * self.trace_values[agents, position])
+
+    def decay(self, discount_factor):
+        # Decay traces
+        self.trace_values *= (discount_factor * self.trace_decay)[:, None]
+        # Prune traces below cutoff
+        self.trace_values[self.trace_values < TRACE_CUTOFF] = 0
+
+    def checkpoint(self, agents):
+        # Return trace arrays of agents
+        return {name: getattr(self, name)[agents] for name in TRACE_ARRAYS}
+
+    def restore(self, arrays):
+        # Restore trace arrays
+        for name in TRACE_ARRAYS: setattr(self, name, np.array(arrays[name]))
@@ -1,18 +1,75 @@
+import multiprocessing as mp
+import os
+import pickle
 import random
+import time
+from functools import partial
+
 import gym.vector
 import numpy as np
 
+from environments.custom.action_repeat import ActionRepeat, make_repeat_env, repeat_infos
+from environments.custom.sharded_vector_env import ShardedVectorEnv
+from environments.custom.vector_envs import NativeVectorEnv, native_envs
+from .episode_metrics import EpisodeMetrics
 from .genetic_algorithm import GeneticAlgorithm
-from .q_learning import QLearning
+from .kernels import kernels
+from .planning import Planner
+from .q_learning import QLearningBatch, write_file
+
+# Episodes in each window compared for plateau
+PLATEAU_WINDOW = 20
 
 
-def reset_data(qLearning, hyperparameters, time_steps, rewards):
-    # Clear time steps
-    time_steps.clear()
-    # Clear rewards
-    rewards.clear()
+def reset_data(qLearning, index, metrics):
+    # Clear episode metrics
+    metrics.clear(index)
     # Reset agent
-    qLearning.reset_agent(hyperparameters)
+    qLearning.new_run(index)
+
+
+def run_single(settings, run_seed):
+    # Unpack run settings
+    [env_id, env_settings, train_settings, parameter_settings,
+     env_functions, other_settings, hyperparameters] = settings
+
+    # Simulation of one run with own seed and single env copy
+    env_simulation = EnvSimulation()
+    env_simulation.unpack_settings(train_settings, env_functions, other_settings)
+    env_simulation.create_env(env_id, [1, False, run_seed] + env_settings[3:])
+    env_simulation.create_agent(parameter_settings)
+
+    # Run until success or failure
+    results, _ = env_simulation.run_experiment(hyperparameters, 1, True)
+    env_simulation.env.close()
+    env_simulation.close_agent()
+    # Return episodes of successful run and episode metrics
+    return results, env_simulation.run_metrics[0]
+
+
+def resume_experiment(path):
+    # Load experiment checkpoint
+    with open(path, "rb") as file:
+        checkpoint = pickle.load(file)
+    # Unpack experiment settings
+    [env_id, env_settings, train_settings, parameter_settings, env_functions, other_settings] = checkpoint["settings"]
+    [hyperparameters, runs, exclude_failure] = checkpoint["experiment"]
+
+    # Rebuild simulation with checkpoint settings
+    env_simulation = EnvSimulation()
+    env_simulation.unpack_settings(train_settings, env_functions, other_settings)
+    env_simulation.create_env(env_id, env_settings)
+    env_simulation.create_agent(parameter_settings)
+
+    # Continue experiment from checkpoint
+    return env_simulation.run_experiment(hyperparameters, runs, exclude_failure)
+
+
+def plateau(rewards):
+    # Not enough episodes to compare
+    if len(rewards) < 2 * PLATEAU_WINDOW: return False
+    # Last window no better than window before
+    return np.mean(rewards[-PLATEAU_WINDOW:]) <= np.mean(rewards[-2 * PLATEAU_WINDOW:-PLATEAU_WINDOW])
 
 
 class EnvSimulation:
@@ -22,191 +79,521 @@ class EnvSimulation:
         self.runs = None
         self.episodes = None
         self.turns = None
+        self.planning_steps = 0
+        self.run_workers = 0
 
         # Functions
+        self.env_functions = None
         self.step_function = None
         self.state_to_bucket = None
         self.action_function = None
         self.success_function = None
         self.reward_function = None
+        self.symmetry_function = None
+        self.coarse_to_bucket = None
 
         # Gym env and agent
         self.env = None
+        self.halves = None
+        self.env_copies = 0
+        # First agent and number of agents of full batch
+        self.agent_offset = 0
+        self.total_agents = None
+        self.env_id = None
+        self.env_settings = None
+        self.parameter_settings = None
         self.seed = 0
-        self.total_runs = 0
-        self.qLearning_list = []
+        self.checkpoint_path = ""
+        self.warm_start_path = ""
+        self.experiment_path = ""
+        self.checkpoint_interval = 0
+        self.experiment = None
+        self.action_repeat = 1
+        # Frame limits of env copies set for last step
+        self.max_frames = None
+        self.qLearning = None
+        self.planner = None
+        self.run_metrics = []
         self.other_settings = {}
 
     def unpack_settings(self, train_settings, env_functions, other_settings):
         # Unpack training settings
-        [self.runs, self.episodes, self.turns] = train_settings
+        [self.runs, self.episodes, self.turns, self.planning_steps, self.run_workers] = train_settings
+        # Keep env functions to rebuild in run workers
+        self.env_functions = env_functions
         # Unpack functions
-        [self.step_function, self.state_to_bucket, self.action_function,
-         self.success_function, self.reward_function] = env_functions
+        [self.step_function, self.state_to_bucket, self.action_function, self.success_function,
+         self.reward_function, self.symmetry_function, self.coarse_to_bucket] = env_functions.env_functions()
         # Unpack other settings
         self.other_settings = other_settings
 
     def create_env(self, env_id, env_settings):
+        # Release agents of old env
+        self.close_agent()
+        # Save env id and settings to resize env
+        self.env_id, self.env_settings = env_id, env_settings
         # Unpack env settings
-        [env_copies, render, self.seed] = env_settings
+        [env_copies, render, self.seed, self.checkpoint_path, self.warm_start_path,
+         kernel_backend, env_backend, env_workers, pipelined, self.experiment_path, self.checkpoint_interval,
+         self.action_repeat] = env_settings
+        self.env_copies = env_copies
+        # Select kernel backend
+        kernels.select_backend(kernel_backend)
         # Set seed
         random.seed(self.seed)
         np.random.seed(self.seed)
-        # Create env
+
+        # Pipeline two half-batches with own envs and agents
+        self.halves = None
+        if pipelined and env_copies > 1:
+            self.env, self.halves = None, []
+            for agents in np.array_split(np.arange(env_copies), 2):
+                # Half-batch env copies and agents keep seeds of full batch and share env workers
+                half = EnvSimulation()
+                half.agent_offset, half.total_agents = int(agents[0]), env_copies
+                half.unpack_settings([self.runs, self.episodes, self.turns, self.planning_steps, 0],
+                                     self.env_functions, self.other_settings)
+                half.create_env(env_id, [len(agents)] + env_settings[1:7] +
+                                [max(env_workers // 2, 1), False, "", 0] + env_settings[11:])
+                self.halves.append(half)
+            return
+
+        # Native vector env steps all env copies in one call
+        if env_backend == "Native" and env_id in native_envs and not render:
+            self.env = native_envs[env_id](env_copies, self.action_repeat)
+            return
+        # Sharded vector env steps env copies in worker processes with shared memory
+        if env_backend == "Sharded" and not render:
+            self.env = ShardedVectorEnv(partial(make_repeat_env, env_id, self.action_repeat, **self.other_settings),
+                                        env_copies, env_workers, self.action_repeat)
+            return
+        # Otherwise create gym vector env
+        if env_backend != "Gym": print("%s env backend unavailable for %s, using Gym" % (env_backend, env_id))
+        # Daemonic run workers cannot start env processes
         self.env = gym.vector.make(env_id,
                                    num_envs=env_copies,
+                                   asynchronous=not mp.current_process().daemon,
                                    render_mode="human" if render else None,
+                                   wrappers=partial(ActionRepeat, repeat=self.action_repeat)
+                                   if self.action_repeat > 1 else None,
                                    **self.other_settings)
 
     def create_agent(self, parameter_settings):
-        # Create copies of Q-Learning agent
-        for x in range(self.env.num_envs):
-            # Create single Q-Learning agent
-            qLearning = QLearning(parameter_settings)
-            # Append to Q-Learning list
-            self.qLearning_list.append(qLearning)
+        # Save parameter settings to resize agents
+        self.parameter_settings = parameter_settings
+        # Create agents of each half-batch
+        if self.halves is not None:
+            for half in self.halves: half.create_agent(parameter_settings)
+            return
+        # Create batch of Q-Learning agents for all env copies
+        self.qLearning = QLearningBatch(parameter_settings, self.env.num_envs, self.seed,
+                                        self.agent_offset, self.total_agents)
+        # Warm start new runs from checkpoint
+        if self.warm_start_path: self.qLearning.warm_start(self.warm_start_path)
+        # Plan with env function simulators
+        env_functions = [self.simulate, self.get_states, self.action_function]
+        self.planner = None if self.planning_steps == 0 else Planner(
+            env_functions, self.env.num_envs, self.env.single_observation_space.shape,
+            self.planning_steps, self.qLearning.num_action, self.qLearning.planning_seeds)
+
+    def close_agent(self):
+        # Close agents of each half-batch
+        for half in self.halves or []: half.close_agent()
+        # Stop background work of agents
+        if self.qLearning is not None: self.qLearning.close()
+        self.qLearning = None
+
+    def resize_env(self, env_copies):
+        # Close old envs
+        for half in self.halves or [self]: half.env.close()
+        # Create env and agents with new number of env copies
+        self.create_env(self.env_id, [env_copies] + self.env_settings[1:])
+        self.create_agent(self.parameter_settings)
 
     def run_experiment(self, hyperparameters, runs, exclude_failure):
+        # Experiment to checkpoint and resume
+        self.experiment = [hyperparameters, runs, exclude_failure]
+        if self.experiment_path:
+            # Check experiment state can be checkpointed
+            if self.run_workers > 0 or self.halves is not None:
+                raise ValueError("Experiment checkpoints need lockstep stepping without run workers")
+            if not hasattr(self.env, "get_state"):
+                raise ValueError("Experiment checkpoints need the Native or Sharded env backend")
+
+        # Farm whole runs out to process pool
+        if self.run_workers > 0: return self.run_pool(hyperparameters, runs, exclude_failure)
+        # All agents share one hyperparameter vector
+        results_list, total_runs = self.run_batch([hyperparameters], runs, exclude_failure, self.experiment_path)
+
+        # Finished experiment needs no checkpoint
+        if self.experiment_path and os.path.exists(self.experiment_path): os.remove(self.experiment_path)
+        # Return results and runs
+        return results_list[0], int(total_runs[0])
+
+    def run_pool(self, hyperparameters, runs, exclude_failure):
+        # Seed of each run from experiment seed and run index
+        run_seeds = [int(seed.generate_state(1)[0]) for seed in np.random.SeedSequence(self.seed).spawn(self.runs)]
+        # Daemonic run workers cannot start shard processes so step envs in process
+        env_backend = self.env_settings[6]
+        if env_backend == "Sharded":
+            env_backend = "Native" if self.env_id in native_envs else "Gym"
+            print("Run workers cannot start env workers, using %s env backend" % env_backend)
+        # Runs save no checkpoints to avoid workers overwriting each other
+        env_settings = self.env_settings[:3] + [""] + self.env_settings[4:6] + [env_backend] + \
+            self.env_settings[7:9] + ["", 0] + self.env_settings[11:]
+        settings = [self.env_id, env_settings, [1, self.episodes, self.turns, self.planning_steps, 0],
+                    self.parameter_settings, self.env_functions, self.other_settings, hyperparameters]
+
+        # Results lists
+        results = []
+        total_runs = 0
+        self.run_metrics = []
+
+        # Collect runs in run order so results do not depend on number of workers
+        with mp.get_context().Pool(self.run_workers) as pool:
+            for run_results, run_metrics in pool.imap(partial(run_single, settings), run_seeds):
+                # Failed runs reach max episodes
+                success = len(run_results) > 0
+                episodes = run_results[0] if success else self.episodes
+                # Add to total runs
+                total_runs += 1
+                # Print message
+                status = "succeeded" if success else "failed"
+                print("Run %d %s in %d episodes" % (total_runs, status, episodes))
+                # Append to results
+                if success or not exclude_failure: results.append(episodes)
+                self.run_metrics.append(run_metrics)
+                # Stop when enough results
+                if len(results) >= runs: break
+
+        # Return results and runs
+        return results, total_runs
+
+    def evaluate_population(self, population, runs):
+        # Train whole population in one batch
+        results_list, _ = self.run_batch(population, runs, False)
+        # Return results of each chromosome
+        return results_list
+
+    def run_batch(self, hyperparameters, runs, exclude_failure, experiment_path=""):
+        # Hyperparameter vector of each agent
+        groups = np.arange(self.env_copies) % len(hyperparameters)
+        agent_hyperparameters = np.asarray(hyperparameters, dtype=float)[groups]
+
+        # Results of each hyperparameter vector
+        results_list = [[] for _ in hyperparameters]
+        total_runs = np.zeros(len(hyperparameters), dtype=int)
+        self.run_metrics = []
+        results = [results_list, total_runs, runs, exclude_failure, self.run_metrics]
+
+        # Agents of each half-batch
+        halves = [self] if self.halves is None else self.halves
+        steppers = [half.run_steps(agent_hyperparameters[agents], groups[agents], agents[0], results, experiment_path)
+                    for half, agents in zip(halves, np.array_split(np.arange(self.env_copies), len(halves)))]
+
+        # Step halves in turn so one half steps envs while other updates Q-tables
+        while steppers:
+            steppers = [stepper for stepper in steppers if next(stepper, False)]
+
+        # Return results and runs of each hyperparameter vector
+        return results_list, total_runs
+
+    def run_steps(self, hyperparameters, groups, offset, results, experiment_path):
+        # Unpack shared results
+        [results_list, total_runs, runs, exclude_failure, run_metrics] = results
 
         # Reset the environment
-        old_obv_list, _ = self.env.reset(seed=self.seed)
+        old_obv_list, _ = self.env.reset(seed=self.seed + self.agent_offset)
+        self.max_frames = None
 
         # Results lists
         env_copies = self.env.num_envs
-        rewards_list = [[] for _ in range(env_copies)]
-        time_steps_list = [[] for _ in range(env_copies)]
-        reward_total_list = [0 for _ in range(env_copies)]
-        results = []
+        metrics = EpisodeMetrics(env_copies, self.episodes)
+        reward_total_list = np.zeros(env_copies)
+        real_steps = 0
 
         # Initialise Q-Learning agents
         self.initialise_agents(hyperparameters, old_obv_list)
+        qLearning = self.qLearning
+        steps = 0
+
+        # Resume from experiment checkpoint
+        if experiment_path and os.path.exists(experiment_path):
+            old_obv_list, reward_total_list, metrics, real_steps, steps = self.load_experiment(experiment_path, results)
+            print("Resumed experiment at step %d" % steps)
+
+        # Run until enough results for every hyperparameter vector
+        active = self.active_groups(results_list, total_runs, runs)
+        while active.any():
 
-        # Run until enough results
-        while len(results) < runs and self.total_runs < self.runs:
+            # Checkpoint experiment at interval
+            if experiment_path and steps > 0 and steps % self.checkpoint_interval == 0:
+                self.save_experiment(experiment_path, [old_obv_list, reward_total_list, metrics, real_steps, steps],
+                                     results)
+            steps += 1
 
             # Get action lists
             actions, opposite_actions, q_actions, opposite_q_actions = self.get_actions()
 
-            # Execute the actions
-            obv_list, _, terminations, _, _ = self.env.step(actions)
-
-            # Loop through Q-Learning agents
-            for index, qLearning in enumerate(self.qLearning_list):
-
-                # Get actions
-                opposite_action = opposite_actions[index]
-                q_action = q_actions[index]
-                opposite_q_action = opposite_q_actions[index]
-
-                # Get obv
-                obv = obv_list[index]
-                old_obv = old_obv_list[index]
-                terminated = terminations[index]
-
-                # Update main action
-                state, reward = self.update_table(qLearning, obv, q_action, terminated)
-                reward_total_list[index] += reward
-
-                # Opposition learning
-                if opposite_action is not None:
-                    # Execute opposite action
-                    opposite_obv, opposite_terminated = self.step_function(old_obv, opposite_action)
-                    # Update opposite action
-                    self.update_table(qLearning, opposite_obv, opposite_q_action, opposite_terminated)
-
-                # Termination
-                if terminated or qLearning.turns >= self.turns:
-
-                    # Get time steps and rewards
-                    time_steps = time_steps_list[index]
-                    rewards = rewards_list[index]
-
-                    # Append time steps and rewards
-                    time_steps.append(qLearning.turns)
-                    rewards.append(reward_total_list[index])
-                    reward_total_list[index] = 0
-
-                    # Variables
-                    success = self.success_function(time_steps, rewards, old_obv)
-                    episodes = qLearning.episodes
-
-                    # Success or failure
-                    if success or episodes >= self.episodes:
-                        # Add to total runs
-                        self.total_runs += 1
+            # Last repeated actions stop at turn limit
+            if self.action_repeat > 1:
+                self.limit_frames(np.minimum(self.action_repeat, self.turns - qLearning.turns + 1))
+
+            # Execute the actions while other half updates Q-tables
+            self.env.step_async(actions)
+            yield True
+            obv_list, _, terminations, _, infos = self.env.step_wait()
+            # Turns count true frames of repeated actions
+            frames, frame_obv = np.ones(env_copies, dtype=int), obv_list
+            if self.action_repeat > 1:
+                frames, frame_obv = repeat_infos(infos, obv_list, self.action_repeat)
+                qLearning.turns += frames - 1
+            real_steps += int(frames.sum())
+            # Turns of first frames of actions
+            first_turns = qLearning.turns - frames + 1
+            # Other half may have finished runs meanwhile
+            active = self.active_groups(results_list, total_runs, runs)
+
+            # Symmetry augmentation shares update of main actions
+            mirrored = None if self.symmetry_function is None else \
+                self.mirror_transitions(old_obv_list, obv_list, q_actions, terminations, frames, frame_obv)
+
+            # Update main actions
+            step_rewards = self.get_rewards(frame_obv, terminations, frames, first_turns)
+            states = self.update_table(obv_list, q_actions, step_rewards, mirrored=mirrored)
+            reward_total_list += step_rewards
+
+            # Opposition learning
+            if opposite_actions is not None:
+                # Execute opposite actions
+                opposite_obv_list, _, opposite_rewards = self.simulate(old_obv_list, opposite_actions, first_turns)
+                # Update opposite actions
+                self.update_table(opposite_obv_list, opposite_q_actions, opposite_rewards, False)
+
+            # All-action backups
+            if qLearning.opposition == "All Actions":
+                self.all_action_update(old_obv_list, q_actions, first_turns)
+
+            # Terminated agents
+            done = terminations | (qLearning.turns >= self.turns)
+
+            # Record time steps and rewards of terminated agents
+            finished = np.flatnonzero(done)
+            metrics.record(finished, qLearning.turns[finished], reward_total_list[finished])
+            reward_total_list[finished] = 0
+
+            # Loop through terminated agents
+            for index in finished:
+
+                # Variables
+                average_steps, average_rewards = metrics.averages(index)
+                success = self.success_function(average_steps, average_rewards, old_obv_list[index])
+                episodes = int(qLearning.episodes[index])
+
+                # Success or failure
+                if success or episodes >= self.episodes:
+                    # Count runs of hyperparameter vectors still short of results
+                    group = groups[index]
+                    if active[group]:
+                        # Add to total runs of hyperparameter vector
+                        total_runs[group] += 1
                         # Print message
                         status = "succeeded" if success else "failed"
-                        print("Agent %s %s in %d episodes for run %d" % (index, status, episodes, self.total_runs))
+                        print("Agent %s %s in %d episodes for run %d" %
+                              (index + offset, status, episodes, total_runs[group]))
                         # Append to results
-                        if success or not exclude_failure: results.append(qLearning.episodes)
-                        # Reset agent
-                        reset_data(qLearning, hyperparameters, time_steps, rewards)
-
-                    # Load new episode
-                    qLearning.new_episode(state)
-
-                else:
-                    # Load new turn
-                    qLearning.save_state(state)
+                        if success or not exclude_failure: results_list[group].append(episodes)
+                        # Keep episode metrics of run
+                        run_metrics.append({"group": int(group), "success": bool(success), **metrics.run_metrics(index)})
+                    # Save successful agent
+                    if success and self.checkpoint_path: qLearning.save_checkpoint(self.checkpoint_path, index)
+                    # Reset agent
+                    reset_data(qLearning, index, metrics)
+                    if self.planner is not None: self.planner.clear(index)
+
+                # Refine coarse Q-table at refine episode or plateau
+                elif qLearning.coarse[index] and (episodes >= qLearning.refine_episode or plateau(metrics.rewards(index))):
+                    print("Agent %s refined Q-table in %d episodes" % (index + offset, episodes))
+                    qLearning.refine(index)
+
+            # Refined and reset agents start from new states
+            if self.coarse_to_bucket is not None: states[done] = self.get_states(obv_list[done], done)
+
+            # Load new episodes
+            qLearning.new_episode(done, states[done])
+            # Load new turns
+            qLearning.save_state(~done, states[~done])
+
+            # Simulated transitions from recent observations
+            if self.planner is not None:
+                self.planner.add(obv_list)
+                self.planner.plan(qLearning)
 
             # Save old observations
             old_obv_list = obv_list
-
-        else:
-            # Return results and runs
-            return results, self.total_runs
+            # Hyperparameter vectors still short of results
+            active = self.active_groups(results_list, total_runs, runs)
+
+        # Print planning cost
+        if self.planner is not None:
+            print("Planning took %.1fs for %d simulated steps over %d real steps" %
+                  (self.planner.planning_time, self.planner.simulated_steps, real_steps))
+
+    def save_experiment(self, path, state, results):
+        # Settings to rebuild experiment on resume
+        train_settings = [self.runs, self.episodes, self.turns, self.planning_steps, self.run_workers]
+        settings = [self.env_id, self.env_settings, train_settings,
+                    self.parameter_settings, self.env_functions, self.other_settings]
+
+        # Full experiment state
+        checkpoint = {
+            "settings": settings,
+            "experiment": self.experiment,
+            "state": state,
+            "results": [results[0], results[1], results[4]],
+            "agents": self.qLearning.checkpoint(self.qLearning.agents, True),
+            "planner": None if self.planner is None else self.planner.checkpoint(),
+            "env": self.env.get_state(),
+            "random": [random.getstate(), np.random.get_state()]
+        }
+
+        # Write to temporary file then rename over old checkpoint
+        write_file(path, lambda file: pickle.dump(checkpoint, file), "wb")
+
+    def load_experiment(self, path, results):
+        # Load experiment checkpoint
+        with open(path, "rb") as file:
+            checkpoint = pickle.load(file)
+
+        # Restore results in place
+        [results_list, total_runs, run_metrics] = checkpoint["results"]
+        results[0][:], results[1][:], results[4][:] = results_list, total_runs, run_metrics
+
+        # Restore agents, planner, env and random states
+        self.qLearning.restore(*checkpoint["agents"])
+        if self.planner is not None: self.planner.restore(checkpoint["planner"])
+        self.env.set_state(checkpoint["env"])
+        random.setstate(checkpoint["random"][0])
+        np.random.set_state(checkpoint["random"][1])
+
+        # Episode wall times restart now
+        state = checkpoint["state"]
+        state[2].start_times[:] = time.perf_counter()
+        # Return loop state
+        return state
+
+    def active_groups(self, results_list, total_runs, runs):
+        # Hyperparameter vectors short of results and within total runs
+        return np.array([len(results) < runs and group_runs < self.runs
+                         for results, group_runs in zip(results_list, total_runs)])
 
     def run_genetic_algorithm(self, tune_setting):
+        # Env copies become runs of each chromosome
+        env_copies = self.env_copies
+        population_size = tune_setting[4]
+        # Train whole generation with env copies of each chromosome in one batch
+        self.resize_env(population_size * env_copies)
         # Create genetic algorithm agent
-        genetic_agent = GeneticAlgorithm(tune_setting, self.run_experiment, self.other_settings)
+        genetic_agent = GeneticAlgorithm(tune_setting, self.evaluate_population, self.other_settings)
         # Run genetic algorithm
-        return genetic_agent.run_algorithm(self.env.num_envs)
+        return genetic_agent.run_algorithm(env_copies)
 
     def initialise_agents(self, hyperparameters, obv):
-
-        # Initialise Q-Learning agents
-        for index, qLearning in enumerate(self.qLearning_list):
-
-            # Reset Q-Learning agents
-            qLearning.reset_agent(hyperparameters)
-            # Get initial state
-            state = self.state_to_bucket(obv[index])
-            # Initialise new episode
-            qLearning.new_episode(state)
+        # Reset Q-Learning agents
+        self.qLearning.reset_agent(hyperparameters)
+        # Get initial states
+        states = self.get_states(obv)
+        # Initialise new episodes
+        self.qLearning.new_episode(self.qLearning.agents, states)
 
     def get_actions(self):
-
-        # Action lists
-        actions = []
-        opposite_actions = []
-        q_actions = []
-        opposite_q_actions = []
-
-        # Loop through Q-Learning agents
-        for qLearning in self.qLearning_list:
-
-            # Select Q-tables
-            qLearning.select_tables()
-            # Select main action
-            q_action = qLearning.select_action()
-            # Get main and opposite action and q-action
-            opposite_q_action, action, opposite_action = self.action_function(q_action)
-
-            # Append to action lists
-            actions.append(action)
-            opposite_actions.append(opposite_action)
-            q_actions.append(q_action)
-            opposite_q_actions.append(opposite_q_action)
-
+        # Select Q-tables
+        self.qLearning.select_tables()
+        # Select main actions
+        q_actions = self.qLearning.select_action()
+        # Get main and opposite actions and q-actions
+        opposite_q_actions, actions, opposite_actions = self.action_function(q_actions)
         # Return action lists
         return actions, opposite_actions, q_actions, opposite_q_actions
 
-    def update_table(self, qLearning, obv, action, terminated):
-        # Get state
-        state = self.state_to_bucket(obv)
-        # Get reward
-        reward = self.reward_function(obv, terminated, qLearning.turns)
-        # Update Q-table
-        qLearning.update_table(state, action, reward)
-        # Return state and reward
-        return state, reward
+    def all_action_update(self, old_obv, q_actions, turns):
+        # Every q-action of each agent
+        num_action = self.qLearning.num_action
+        all_q_actions = np.repeat(np.arange(num_action)[:, None], len(q_actions), axis=1)
+        # Simulate all actions from old observations in one batched call
+        _, all_actions, _ = self.action_function(all_q_actions)
+        obv, _, rewards = self.simulate(np.broadcast_to(old_obv, (num_action,) + old_obv.shape), all_actions, turns)
+
+        # Skip taken actions already updated with real transitions
+        untaken = all_q_actions != q_actions
+        agents = np.broadcast_to(self.qLearning.agents, untaken.shape)[untaken]
+        states = self.get_states(obv)[untaken]
+        rewards = np.broadcast_to(rewards, untaken.shape)[untaken]
+        # Update Q-tables with simulated actions
+        self.qLearning.action_backups(agents, self.qLearning.state_0[agents], all_q_actions[untaken], rewards, states)
+
+    def mirror_transitions(self, old_obv, obv, actions, terminations, frames, frame_obv):
+        # Mirror old and new observations together
+        mirrored_obv, mirrored_actions = self.symmetry_function(np.stack([old_obv, obv]), actions)
+        # Mirror observation of each repeated frame
+        mirrored_frames = mirrored_obv[1] if self.action_repeat == 1 else self.symmetry_function(frame_obv, actions)[0]
+        # Get mirrored states and rewards
+        state_0, states = self.get_states(mirrored_obv)
+        rewards = self.get_rewards(mirrored_frames, terminations, frames, self.qLearning.turns - frames + 1)
+        # Return mirrored transitions
+        return state_0, mirrored_actions, rewards, states
+
+    def get_states(self, obv, agents=None):
+        # Get fine states
+        states = self.state_to_bucket(obv)
+        # Get coarse states of agents before refinement
+        if self.coarse_to_bucket is not None:
+            coarse = self.qLearning.coarse[self.qLearning.agents if agents is None else agents]
+            states = np.where(coarse, self.coarse_to_bucket(obv), states)
+        # Return states
+        return states
+
+    def update_table(self, obv, actions, rewards, trajectory=True, mirrored=None):
+        # Get states
+        states = self.get_states(obv)
+        # Update Q-tables with mirrored transitions
+        self.qLearning.update_table(states, actions, rewards, trajectory, mirrored)
+        # Return states
+        return states
+
+    def get_rewards(self, frame_obv, terminations, frames, turns):
+        # Get rewards of single frame
+        if self.action_repeat == 1: return self.reward_function(frame_obv, terminations, turns)
+        # Sum rewards of stepped frames with episode ending on last frame
+        rewards = 0
+        for frame in range(self.action_repeat):
+            last = terminations & (frame == frames - 1)
+            frame_rewards = self.reward_function(frame_obv[:, frame], last, turns + frame)
+            rewards = rewards + np.where(frame < frames, frame_rewards, 0)
+        # Return rewards of actions
+        return rewards
+
+    def simulate(self, obv, actions, turns):
+        # Simulate first frame of actions
+        obv, terminations = self.step_function(obv, actions)
+        rewards = self.reward_function(obv, terminations, turns)
+        # Repeat actions up to turn limit holding terminated observations
+        max_frames = np.minimum(self.action_repeat, self.turns - turns + 1)
+        for frame in range(1, self.action_repeat):
+            stepping = ~terminations & (frame < max_frames)
+            next_obv, next_terminations = self.step_function(obv, actions)
+            next_terminations = next_terminations & stepping
+            # Sum rewards of stepped frames
+            rewards = rewards + np.where(stepping, self.reward_function(next_obv, next_terminations, turns + frame), 0)
+            obv = np.where(stepping[..., None], next_obv, obv)
+            terminations = terminations | next_terminations
+        # Return observations, terminations and rewards after repeat
+        return obv, terminations, rewards
+
+    def limit_frames(self, max_frames):
+        # Native and sharded envs read frame limits from shared array
+        if isinstance(self.env, (NativeVectorEnv, ShardedVectorEnv)): self.env.max_frames[:] = max_frames
+        # Gym env copies read frame limits from wrappers so only send changed limits
+        elif self.max_frames is None or not np.array_equal(max_frames, self.max_frames):
+            self.env.set_attr("max_frames", max_frames.tolist())
+        self.max_frames = max_frames
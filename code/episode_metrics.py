@@ -0,0 +1,64 @@
+import time
+import numpy as np
+
+# Episodes in success window
+SUCCESS_WINDOW = 100
+
+# Per-episode metric arrays
+METRIC_ARRAYS = ["episode_lengths", "episode_rewards", "episode_times"]
+
+
+class EpisodeMetrics:
+    def __init__(self, num_agents, max_episodes):
+        # Preallocated metrics of each agent episode
+        self.episode_lengths = np.zeros((num_agents, max_episodes), dtype=int)
+        self.episode_rewards = np.zeros((num_agents, max_episodes))
+        self.episode_times = np.zeros((num_agents, max_episodes))
+
+        # Recorded episodes and episode start times
+        self.counts = np.zeros(num_agents, dtype=int)
+        self.start_times = np.full(num_agents, time.perf_counter())
+
+        # Running sums over success window
+        self.length_sums = np.zeros(num_agents, dtype=int)
+        self.reward_sums = np.zeros(num_agents)
+
+    def clear(self, agents):
+        # Forget episodes of agents
+        self.counts[agents] = 0
+        self.length_sums[agents] = 0
+        self.reward_sums[agents] = 0
+        self.start_times[agents] = time.perf_counter()
+
+    def record(self, agents, lengths, rewards):
+        # Save metrics at next episode of agents
+        end_time = time.perf_counter()
+        counts = self.counts[agents]
+        self.episode_lengths[agents, counts] = lengths
+        self.episode_rewards[agents, counts] = rewards
+        self.episode_times[agents, counts] = end_time - self.start_times[agents]
+        self.start_times[agents] = end_time
+
+        # Add new episodes to window sums
+        self.length_sums[agents] += lengths
+        self.reward_sums[agents] += rewards
+        # Remove episodes leaving window
+        leaving = counts >= SUCCESS_WINDOW
+        self.length_sums[agents[leaving]] -= self.episode_lengths[agents[leaving], counts[leaving] - SUCCESS_WINDOW]
+        self.reward_sums[agents[leaving]] -= self.episode_rewards[agents[leaving], counts[leaving] - SUCCESS_WINDOW]
+
+        # Advance episode counts
+        self.counts[agents] += 1
+
+    def averages(self, agent):
+        # Average length and reward over success window
+        window = min(self.counts[agent], SUCCESS_WINDOW)
+        return self.length_sums[agent] / window, self.reward_sums[agent] / window
+
+    def rewards(self, agent):
+        # Recorded rewards of agent
+        return self.episode_rewards[agent, :self.counts[agent]]
+
+    def run_metrics(self, agent):
+        # Copy recorded metrics of agent run
+        return {name: getattr(self, name)[agent, :self.counts[agent]].copy() for name in METRIC_ARRAYS}
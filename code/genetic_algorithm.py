@@ -114,10 +114,10 @@ class GeneticAlgorithm:
 
     def evaluate_population(self, population, runs):
         evaluated_population = []
+        # Evaluate fitness of whole population together
+        results_list = self.fitness_function(population, runs)
         # Loop through chromosome in population
-        for chromosome in population:
-            # Evaluate chromosome fitness
-            results = self.fitness_function(chromosome, self.other_settings, runs, False)[0]
+        for chromosome, results in zip(population, results_list):
             # Get average of results
             fitness = sum(results) / len(results)
             # Append chromosome with fitness
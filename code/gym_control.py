@@ -75,7 +75,7 @@ def extract_settings(common_widgets):
     [env_settings, train_settings] = extract_widget_values(env_widgets)
     [parameter_settings, state_space] = extract_widget_values(parameter_widgets)
     other_settings = {} if other_widgets is None else convert_dict(other_widgets)
-    parameter_settings.insert(1, tuple(state_space))
+    parameter_settings[1:1] = [tuple(state_space[:-1]), state_space[-1]]
 
     # Return settings
     return env_settings, train_settings, parameter_settings, other_settings
@@ -98,7 +98,7 @@ class GymControl:
 
         # Load env functions
         EnvFunctions = env_dict[env_id][1]
-        functions = EnvFunctions(parameter_settings, other_settings).env_functions()
+        functions = EnvFunctions(parameter_settings, other_settings)
 
         # Load reinforcement learning
         self.env_simulation.unpack_settings(train_settings, functions, other_settings)
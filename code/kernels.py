@@ -0,0 +1,135 @@
+import numpy as np
+
+# Numba is optional
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def numpy_grid_states(obv, scaling, offset, max_buckets, strides):
+    # Mapping the state bounds to the bucket array
+    bucket_indices = np.round(scaling * np.asarray(obv, dtype=float) - offset)
+    # Clip buckets outside state bounds
+    bucket_indices = np.clip(bucket_indices, 0, max_buckets).astype(int)
+    # Return flat state index
+    return np.dot(bucket_indices, strides)
+
+
+def numpy_greedy_actions(q_sum, agents, states):
+    # Return best actions of Q-table sums
+    return np.argmax(q_sum[agents, states], axis=1)
+
+
+def numpy_td_update(q_tables, q_sum, agents, main_table, secondary_table,
+                    state_0, states, actions, rewards, learning_rate, discount_factor):
+    # Get best actions from main Q-tables
+    best_actions = np.argmax(q_tables[agents, main_table, states], axis=1)
+    # Get best Q-values from secondary Q-tables
+    best_q = q_tables[agents, secondary_table, states, best_actions]
+    # Get Q-value changes
+    q_values = q_tables[agents, main_table, state_0, actions]
+    delta = learning_rate * (rewards + discount_factor * best_q - q_values)
+    # Update Q-tables and Q-table sums
+    np.add.at(q_tables, (agents, main_table, state_0, actions), delta)
+    np.add.at(q_sum, (agents, state_0, actions), delta)
+
+
+def loop_grid_states(obv, scaling, offset, max_buckets, strides):
+    # Flat state index of each observation
+    states = np.zeros(obv.shape[0], dtype=np.int64)
+    # Loop through observations and dimensions
+    for index in range(obv.shape[0]):
+        for dim in range(obv.shape[1]):
+            # Map and clip single bucket
+            bucket = np.rint(scaling[dim] * np.float64(obv[index, dim]) - offset[dim])
+            bucket = min(max(bucket, 0.0), max_buckets[dim])
+            states[index] += int(bucket) * strides[dim]
+    # Return flat state indices
+    return states
+
+
+def loop_greedy_actions(q_sum, agents, states):
+    # Best action of each agent
+    actions = np.empty(len(agents), dtype=np.int64)
+    # Loop through agents
+    for index in range(len(agents)):
+        actions[index] = np.argmax(q_sum[agents[index], states[index]])
+    # Return best actions
+    return actions
+
+
+def loop_td_update(q_tables, q_sum, agents, main_table, secondary_table,
+                   state_0, states, actions, rewards, learning_rate, discount_factor):
+    # Q-value changes from Q-tables before update like NumPy kernel
+    delta = np.empty(len(agents))
+    # Loop through transitions
+    for index in range(len(agents)):
+        agent, main = agents[index], main_table[index]
+        # Get best Q-value from secondary Q-table
+        best_action = np.argmax(q_tables[agent, main, states[index]])
+        best_q = q_tables[agent, secondary_table[index], states[index], best_action]
+        # Get Q-value change
+        q_value = q_tables[agent, main, state_0[index], actions[index]]
+        delta[index] = learning_rate[index] * (rewards[index] + discount_factor[index] * best_q - q_value)
+
+    # Loop through transitions
+    for index in range(len(agents)):
+        # Update Q-table and Q-table sum
+        q_tables[agents[index], main_table[index], state_0[index], actions[index]] += delta[index]
+        q_sum[agents[index], state_0[index], actions[index]] += delta[index]
+
+
+def compiled_grid_states(function):
+    # Compiled kernel works on flat batches of observations
+    def grid_states(obv, scaling, offset, max_buckets, strides):
+        obv = np.asarray(obv)
+        states = function(obv.reshape(-1, obv.shape[-1]), scaling, offset, max_buckets, strides)
+        return states.reshape(obv.shape[:-1])
+    return grid_states
+
+
+def compiled_td_update(function):
+    # Compiled kernel needs a value for each agent
+    def td_update(q_tables, q_sum, agents, main_table, secondary_table,
+                  state_0, states, actions, rewards, learning_rate, discount_factor):
+        rewards = np.broadcast_to(np.asarray(rewards, dtype=float), agents.shape)
+        function(q_tables, q_sum, agents, main_table, secondary_table,
+                 state_0, states, actions, rewards, learning_rate, discount_factor)
+    return td_update
+
+
+# Kernel functions of each backend
+KERNEL_BACKENDS = {
+    "NumPy": (numpy_grid_states, numpy_greedy_actions, numpy_td_update)
+}
+
+# Compile loop kernels when numba is installed
+if njit is not None:
+    KERNEL_BACKENDS["Numba"] = (compiled_grid_states(njit(cache=True)(loop_grid_states)),
+                                njit(cache=True)(loop_greedy_actions),
+                                compiled_td_update(njit(cache=True)(loop_td_update)))
+
+
+class Kernels:
+    def __init__(self, backend):
+        # Kernel functions
+        self.backend = None
+        self.grid_states = None
+        self.greedy_actions = None
+        self.td_update = None
+        # Select backend
+        self.select_backend(backend)
+
+    def select_backend(self, backend):
+        # Fall back to NumPy if backend unavailable
+        if backend not in KERNEL_BACKENDS:
+            print("%s kernels unavailable, using NumPy kernels" % backend)
+            backend = "NumPy"
+        # Load kernel functions
+        self.backend = backend
+        [self.grid_states, self.greedy_actions, self.td_update] = KERNEL_BACKENDS[backend]
+
+
+# Kernels shared by agents and env functions
+kernels = Kernels("NumPy")
@@ -0,0 +1,81 @@
+import time
+import numpy as np
+
+from .random_blocks import agent_draws
+
+# Recent observations kept for planning
+PLANNING_MEMORY = 256
+
+
+class Planner:
+    def __init__(self, env_functions, num_agents, obv_shape, planning_steps, num_action, seed_sequences):
+        # Unpack functions
+        [self.simulate, self.get_states, self.action_function] = env_functions
+
+        # Planning settings
+        self.agents = np.arange(num_agents)
+        self.planning_steps = planning_steps
+        self.num_action = num_action
+        # Random stream of each agent
+        self.generators = [np.random.default_rng(agent_seed) for agent_seed in seed_sequences]
+
+        # Ring buffer of recent observations of each agent
+        self.observations = np.zeros((num_agents, PLANNING_MEMORY) + obv_shape, dtype=np.float32)
+        self.cursors = np.zeros(num_agents, dtype=int)
+        self.sizes = np.zeros(num_agents, dtype=int)
+
+        # Planning cost
+        self.simulated_steps = 0
+        self.planning_time = 0
+
+    def clear(self, agents):
+        # Forget observations of agents
+        self.cursors[agents] = 0
+        self.sizes[agents] = 0
+
+    def add(self, obv):
+        # Save observations at cursors
+        self.observations[self.agents, self.cursors] = obv
+        # Advance cursors and sizes
+        self.cursors = (self.cursors + 1) % PLANNING_MEMORY
+        self.sizes = np.minimum(self.sizes + 1, PLANNING_MEMORY)
+
+    def checkpoint(self):
+        # Return ring buffers, random state and planning cost
+        return [self.observations.copy(), self.cursors.copy(), self.sizes.copy(),
+                [generator.bit_generator.state for generator in self.generators],
+                self.simulated_steps, self.planning_time]
+
+    def restore(self, state):
+        # Restore ring buffers, random state and planning cost
+        [self.observations, self.cursors, self.sizes, generator_states, self.simulated_steps, self.planning_time] = state
+        for generator, generator_state in zip(self.generators, generator_states):
+            generator.bit_generator.state = generator_state
+
+    def plan(self, qLearning):
+        # Time planning stage
+        start_time = time.perf_counter()
+
+        # Sample recent observations of each agent from agent streams
+        draws = np.stack([generator.random(self.planning_steps) for generator in self.generators])
+        positions = (draws * self.sizes[:, None]).astype(int)
+        agents = np.repeat(self.agents, self.planning_steps).reshape(positions.shape)
+        filled = self.sizes[agents] > 0
+        agents, positions = agents[filled], positions[filled]
+        obv = self.observations[agents, positions]
+
+        # Simulate random actions
+        counts = np.bincount(agents, minlength=len(self.agents))
+        q_actions = agent_draws(self.generators, counts,
+                                lambda generator, size: generator.integers(0, self.num_action, size))
+        _, actions, _ = self.action_function(q_actions)
+        next_obv, _, rewards = self.simulate(obv, actions, qLearning.turns[agents])
+
+        # Update Q-tables with simulated transitions
+        rewards = np.broadcast_to(rewards, agents.shape)
+        qLearning.batch_update(agents, self.get_states(obv, agents), q_actions, rewards,
+                               self.get_states(next_obv, agents), self.generators)
+
+        # Add planning cost
+        self.simulated_steps += len(agents)
+        self.planning_time += time.perf_counter() - start_time
@@ -1,142 +1,467 @@
-import random
+import json
+import os
+import shutil
 import numpy as np
 
+from .curriculum import get_coarse_state
+from .eligibility_traces import EligibilityTraces
+from .kernels import kernels
+from .q_tables import create_tables, DenseTables, TiledTables
+from .random_blocks import agent_draws, RandomBlock
+from .replay_buffer import ReplayBuffer
+from .tile_coding import get_state_rows
 
-class QLearning:
-    def __init__(self, parameter_settings):
+# Name of checkpoint header file
+CHECKPOINT_HEADER = "header.json"
+
+# Counters and schedules of each agent
+AGENT_ARRAYS = ["episodes", "turns", "state_0", "main_table", "secondary_table",
+                "learning_rate", "explore_rate", "discount_factor", "coarse"]
+
+# Blocks of random draws
+RANDOM_BLOCKS = ["explore_draws", "action_draws", "table_draws", "offset_draws"]
+
+
+def write_checkpoint(path, header, arrays):
+    # Create temporary checkpoint folder
+    temp_path, old_path = path + ".tmp", path + ".old"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+
+    # Save arrays as .npy files
+    for name, array in arrays.items(): np.save(os.path.join(temp_path, name + ".npy"), array)
+    # Save header with array names
+    header["arrays"] = list(arrays.keys())
+    with open(os.path.join(temp_path, CHECKPOINT_HEADER), "w") as file:
+        json.dump(header, file, indent=4)
+
+    # Swap whole folders so header never points at mix of old and new arrays
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path): os.rename(path, old_path)
+    os.rename(temp_path, path)
+    # Memory-mapped readers keep data of removed old checkpoint
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def write_file(file_path, write_function, mode):
+    # Write to temporary file
+    temp_path = file_path + ".tmp"
+    with open(temp_path, mode) as file:
+        write_function(file)
+    # Replace old file so memory-mapped readers keep old data
+    os.replace(temp_path, file_path)
+
+
+def read_checkpoint(path, mmap_mode):
+    # Crash between folder swaps leaves old checkpoint
+    if not os.path.exists(path) and os.path.exists(path + ".old"): path = path + ".old"
+    # Load header
+    with open(os.path.join(path, CHECKPOINT_HEADER)) as file:
+        header = json.load(file)
+    # Memory-map arrays
+    arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode) for name in header["arrays"]}
+    # Return header and arrays
+    return header, arrays
+
+
+class QLearningBatch:
+    def __init__(self, parameter_settings, num_agents, seed, agent_offset=0, total_agents=None):
         # Unpack parameter settings
-        [self.num_q_table, self.num_state, self.num_action, self.random_type, _, _] = parameter_settings
-        self.buckets = self.num_state + (self.num_action,)
+        [self.num_q_table, self.num_state, self.num_tilings, self.num_action,
+         self.random_type, self.precision, self.opposition, _, _, self.trace_decay, self.trace_length,
+         self.replay_capacity, self.replay_batch, self.replay_interval,
+         self.visit_learning, self.explore_bonus,
+         coarse_factor, self.refine_episode, self.refine_interpolation] = parameter_settings
+        self.buckets = (get_state_rows(self.num_state, self.num_tilings), self.num_action)
+        # States have active tile of each tiling
+        self.state_shape = () if self.num_tilings == 1 else (self.num_tilings,)
+
+        # Agents
+        self.num_agents = num_agents
+        self.agents = np.arange(num_agents)
+        # Each agent twice for real and mirrored transitions
+        self.paired_agents = np.concatenate((self.agents, self.agents))
+
+        # Agents of batch take own random streams from full batch of all agents
+        batch_agents = slice(agent_offset, agent_offset + num_agents)
+        total_agents = agent_offset + num_agents if total_agents is None else total_agents
+        # Random streams of each agent for choices, Q-tables, replay and planning
+        choice_seeds, table_seeds, replay_seeds, self.planning_seeds = [
+            seed_sequence.spawn(total_agents)[batch_agents] for seed_sequence in np.random.SeedSequence(seed).spawn(4)]
+        self.generators = [np.random.default_rng(agent_seed) for agent_seed in choice_seeds]
+
+        # Blocks of random draws
+        self.explore_draws = RandomBlock(self.generators, lambda generator, size: generator.random(size), float)
+        self.action_draws = RandomBlock(
+            self.generators, lambda generator, size: generator.integers(0, self.num_action, size), int)
+        self.table_draws = RandomBlock(
+            self.generators, lambda generator, size: generator.integers(0, self.num_q_table, size), int)
+        self.offset_draws = RandomBlock(
+            self.generators, lambda generator, size: generator.integers(1, self.num_q_table, size), int)
 
         # Counters
-        self.episodes = 0
-        self.turns = 0
+        self.episodes = np.zeros(num_agents, dtype=int)
+        self.turns = np.zeros(num_agents, dtype=int)
 
         # Q-Tables
-        self.q_tables = []
-        self.state_0 = None
-        self.main_table = None
-        self.secondary_table = None
+        self.tables = create_tables(num_agents, self.num_q_table, self.buckets,
+                                    self.random_type, self.precision, table_seeds)
+        if self.num_tilings > 1: self.tables = TiledTables(self.tables, self.num_tilings)
+        # Count state-action visits for learning rates and exploration bonus
+        self.count_visits = self.visit_learning or self.explore_bonus > 0
+        if self.count_visits: self.tables.track_visits()
+        # Fused kernels work on dense Float64 Q-tables
+        self.fused = isinstance(self.tables, DenseTables) and self.tables.exact
+        self.state_0 = np.zeros((num_agents,) + self.state_shape, dtype=int)
+
+        # Coarse-to-fine curriculum
+        self.coarse_state = get_coarse_state(self.num_state, coarse_factor)
+        self.curriculum = coarse_factor > 1 and self.refine_episode > 0
+        if self.curriculum and not isinstance(self.tables, DenseTables):
+            raise ValueError("Coarse-to-fine transfer needs dense Q-tables with one tiling")
+        self.coarse = np.zeros(num_agents, dtype=bool)
+        self.main_table = np.zeros(num_agents, dtype=int)
+        self.secondary_table = np.zeros(num_agents, dtype=int)
+        self.greedy = np.ones(num_agents, dtype=bool)
+
+        # Eligibility traces
+        self.traces = EligibilityTraces(
+            num_agents, self.trace_length, self.trace_decay, self.state_shape) if self.trace_decay > 0 else None
+
+        # Experience replay
+        self.replay = None if self.replay_capacity == 0 else ReplayBuffer(
+            num_agents, self.replay_capacity, self.replay_batch, self.state_shape, replay_seeds)
+        self.replay_steps = 0
 
         # Learning rate
         self.learning_initial = None
         self.learning_final = None
         self.learning_step = None
-        self.learning_rate = None
+        self.learning_rate = np.zeros(num_agents)
 
         # Explore rate
         self.explore_initial = None
         self.explore_final = None
         self.explore_step = None
-        self.explore_rate = None
+        self.explore_rate = np.zeros(num_agents)
 
         # Discount factor
         self.discount_initial = None
         self.discount_final = None
         self.discount_step = None
-        self.discount_factor = None
+        self.discount_factor = np.zeros(num_agents)
 
     def reset_agent(self, hyperparameters):
-        # Unpack hyperparameters settings
-        [self.learning_initial, self.learning_final, self.learning_step,
-         self.explore_initial, self.explore_final, self.explore_step,
-         self.discount_initial, self.discount_final, self.discount_step] = hyperparameters
+        # Unpack hyperparameters of each agent
+        self.unpack_hyperparameters(hyperparameters)
         # Check hyperparameter sign
         self.check_step_sign()
-        # Initialise new run
-        self.new_run()
+        # Initialise new run for all agents
+        self.new_run(self.agents)
+
+    def unpack_hyperparameters(self, hyperparameters):
+        # Broadcast single hyperparameter vector to all agents
+        hyperparameters = np.broadcast_to(np.asarray(hyperparameters, dtype=float), (self.num_agents, 9))
+        # Columns of agent hyperparameters
+        [self.learning_initial, self.learning_final, self.learning_step,
+         self.explore_initial, self.explore_final, self.explore_step,
+         self.discount_initial, self.discount_final, self.discount_step] = hyperparameters.T.copy()
+
+    def pack_hyperparameters(self):
+        # Rows of agent hyperparameters
+        return np.stack([self.learning_initial, self.learning_final, self.learning_step,
+                         self.explore_initial, self.explore_final, self.explore_step,
+                         self.discount_initial, self.discount_final, self.discount_step], axis=1)
+
+    def save_checkpoint(self, path, agents):
+        # Save checkpoint of agents
+        write_checkpoint(path, *self.checkpoint(agents))
+
+    def checkpoint(self, agents, experiment=False):
+        # Agents to save
+        agents = np.atleast_1d(self.agents[agents])
+
+        # Header and arrays of Q-tables
+        header, arrays = self.tables.checkpoint(agents, experiment)
+
+        # Settings, hyperparameters and random states
+        header.update({
+            "num_agents": len(agents),
+            "num_state": list(self.num_state),
+            "num_action": self.num_action,
+            "num_q_table": self.num_q_table,
+            "random_type": self.random_type,
+            "precision": self.precision,
+            "trace_decay": self.trace_decay,
+            "trace_length": self.trace_length,
+            "replay_capacity": self.replay_capacity,
+            "replay_steps": self.replay_steps,
+            "hyperparameters": self.pack_hyperparameters()[agents].tolist(),
+            "choice_generators": [self.generators[agent].bit_generator.state for agent in agents],
+            "cursors": [getattr(self, name).cursor for name in RANDOM_BLOCKS]
+        })
+
+        # Counters, schedules and blocks of random draws
+        arrays.update({name: getattr(self, name)[agents] for name in AGENT_ARRAYS})
+        arrays.update({name: getattr(self, name).block[:, agents] for name in RANDOM_BLOCKS})
+        if self.traces is not None: arrays.update(self.traces.checkpoint(agents))
+        if self.replay is not None:
+            header["replay_generators"], replay_arrays = self.replay.checkpoint(agents)
+            arrays.update(replay_arrays)
+
+        # Return header and arrays
+        return header, arrays
+
+    def restore(self, header, arrays):
+        # Check checkpoint has all agents
+        if header["num_agents"] != self.num_agents:
+            raise ValueError("Checkpoint has %d agents instead of %d" % (header["num_agents"], self.num_agents))
 
-    def new_run(self):
-        # Reset episode
-        self.episodes = 0
+        # Restore hyperparameters, counters and schedules
+        self.unpack_hyperparameters(header["hyperparameters"])
+        for name in AGENT_ARRAYS: setattr(self, name, np.array(arrays[name]))
+
+        # Restore random states
+        for name, cursor in zip(RANDOM_BLOCKS, header["cursors"]):
+            random_block = getattr(self, name)
+            random_block.block[:] = arrays[name]
+            random_block.cursor = cursor
+        for generator, state in zip(self.generators, header["choice_generators"]):
+            generator.bit_generator.state = state
+
+        # Restore eligibility traces
+        if self.traces is not None: self.traces.restore(arrays)
+        # Restore replay buffers
+        if self.replay is not None:
+            self.replay.restore(header["replay_generators"], arrays)
+            self.replay_steps = header["replay_steps"]
+
+        # Restore Q-tables
+        self.tables.restore(header, arrays)
+
+    def close(self):
+        # Stop background Q-table generation
+        self.tables.close()
+
+    def warm_start(self, path):
+        # Memory-map checkpoint as read only
+        header, arrays = read_checkpoint(path, "r")
+        # New runs start from checkpoint Q-tables
+        self.tables.warm_start(header, arrays)
+
+    def new_run(self, agents):
+        # Reset episodes
+        self.episodes[agents] = 0
+        # Start on coarse states
+        self.coarse[agents] = self.curriculum
+        # Empty replay buffers
+        if self.replay is not None: self.replay.clear(agents)
         # Reset Q-tables
-        self.generate_tables()
+        self.generate_tables(agents)
 
-    def new_episode(self, state):
-        # Get initial state
-        self.state_0 = state
+    def refine(self, agents):
+        # Upsample coarse Q-tables onto fine states
+        agents = np.atleast_1d(self.agents[agents])
+        self.tables.upsample(agents, self.coarse_state, self.num_state, self.refine_interpolation)
+        self.coarse[agents] = False
+        # Stored transitions use coarse states
+        if self.replay is not None: self.replay.clear(agents)
+
+    def new_episode(self, agents, states):
+        # Get initial states
+        self.state_0[agents] = states
         # Set hyperparameters
-        self.set_hyperparameters()
-        # Increment episode
-        self.episodes += 1
+        self.set_hyperparameters(agents)
+        # Increment episodes
+        self.episodes[agents] += 1
+        # Clear eligibility traces
+        if self.traces is not None: self.traces.clear(agents)
         # Reset turns
-        self.turns = 1
-
-    def set_hyperparameters(self):
-        self.learning_rate = self.get_learning_rate()
-        self.explore_rate = self.get_explore_rate()
-        self.discount_factor = self.get_discount_factor()
-
-    def generate_tables(self):
-        # Clear old Q-tables
-        self.q_tables.clear()
-        # Loop to create Q-tables
-        for x in range(self.num_q_table):
-            # Return single table
-            q_table = self.single_table()
-            # Append to Q-table list
-            self.q_tables.append(q_table)
-
-    def single_table(self):
-        # Assign Q-table value
-        if self.random_type == "None":
-            # Generate arrays of 0s
-            return np.zeros(self.buckets)
-        elif self.random_type == "Normal":
-            # Generate arrays with normal distribution
-            temp_table = np.random.randn(*self.buckets) * (10 / 3)
-            # Bound arrays to range
-            return np.clip(temp_table, -10, 10)
-        else:
-            # Generate arrays with uniform distribution
-            return np.random.uniform(-10, 10, self.buckets)
+        self.turns[agents] = 1
+
+    def set_hyperparameters(self, agents):
+        episodes = self.episodes[agents]
+        self.learning_rate[agents] = self.get_learning_rate(agents, episodes)
+        self.explore_rate[agents] = self.get_explore_rate(agents, episodes)
+        self.discount_factor[agents] = self.get_discount_factor(agents, episodes)
+
+    def generate_tables(self, agents):
+        # Reset Q-tables of agents
+        self.tables.reset(np.atleast_1d(self.agents[agents]))
 
     def select_action(self):
         # Available actions
-        random_action = random.randint(0, self.num_action - 1)
-        best_action = np.argmax(sum(self.q_tables)[self.state_0])
-        # Select best or random action
-        return random_action if random.random() < self.explore_rate else best_action
+        random_actions = self.action_draws.next_draws()
+        if self.explore_bonus > 0:
+            best_actions = np.argmax(self.tables.sum_rows(self.agents, self.state_0) + self.get_bonus(), axis=1)
+        elif self.fused:
+            best_actions = kernels.greedy_actions(np.asarray(self.tables.q_sum), self.agents, self.state_0)
+        else:
+            best_actions = np.argmax(self.tables.sum_rows(self.agents, self.state_0), axis=1)
+        # Select best or random actions
+        actions = np.where(self.explore_draws.next_draws() < self.explore_rate, random_actions, best_actions)
+        # Exploratory actions cut eligibility traces
+        self.greedy = actions == best_actions
+        return actions
+
+    def get_bonus(self):
+        # Count-based bonus of each table in Q-table sum
+        visits = self.tables.visit_counts(self.agents, self.state_0)
+        return self.num_q_table * self.explore_bonus / np.sqrt(visits + 1.0)
 
     def select_tables(self):
-        # Select Q-tables
-        if len(self.q_tables) > 1:
-            [self.main_table, self.secondary_table] = random.sample(self.q_tables, 2)
+        # Select Q-table indices
+        if self.num_q_table > 1:
+            # Secondary table is offset from main table so both differ
+            self.main_table = self.table_draws.next_draws()
+            offset = self.offset_draws.next_draws()
+            self.secondary_table = (self.main_table + offset) % self.num_q_table
+
+    def update_table(self, states, actions, rewards, trajectory=True, mirrored=None):
+        # Count visited state-actions
+        if self.count_visits and trajectory: self.tables.add_visits(self.agents, self.state_0, actions)
+        # Update Q-tables with transitions
+        self.update_transitions(states, actions, rewards, trajectory, mirrored)
+
+        # Replay stored transitions
+        if self.replay is not None and trajectory:
+            self.replay.add(self.state_0, actions, rewards, states)
+            self.replay_steps += 1
+            if self.replay_steps % self.replay_interval == 0: self.replay_update()
+
+    def update_transitions(self, states, actions, rewards, trajectory, mirrored=None):
+        # Transitions of all agents
+        agents, main_table, secondary_table, state_0 = self.agents, self.main_table, self.secondary_table, self.state_0
+        traced = self.traces is not None and trajectory
+
+        # Mirrored transitions join same update unless traces spread real transitions
+        if mirrored is not None and not traced:
+            [mirror_0, mirror_actions, mirror_rewards, mirror_states] = mirrored
+            agents = self.paired_agents
+            main_table, secondary_table = np.concatenate((main_table, main_table)), \
+                np.concatenate((secondary_table, secondary_table))
+            state_0, states = np.concatenate((state_0, mirror_0)), np.concatenate((states, mirror_states))
+            actions = np.concatenate((actions, mirror_actions))
+            # Real rewards then mirrored rewards
+            paired_rewards = np.empty(len(agents))
+            paired_rewards[:self.num_agents], paired_rewards[self.num_agents:] = rewards, mirror_rewards
+            rewards, mirrored = paired_rewards, None
+
+        # Update dense Float64 Q-tables with fused kernel
+        if self.fused and not traced:
+            kernels.td_update(np.asarray(self.tables.q_tables), np.asarray(self.tables.q_sum), agents,
+                              main_table, secondary_table, state_0, states, actions, rewards,
+                              self.get_learning_rates(agents, state_0, actions), self.discount_factor[agents])
         else:
-            [self.main_table, self.secondary_table] = [self.q_tables[0]] * 2
-
-    def update_table(self, state, action, reward):
-        # Get best Q-value
-        best_q = self.secondary_table[state + (np.argmax(self.main_table[state]),)]
-        # Update Q-table
-        self.main_table[self.state_0 + (action,)] += self.learning_rate * (
-                reward + self.discount_factor * best_q - self.main_table[self.state_0 + (action,)])
-
-    def save_state(self, state):
-        # Save old state
-        self.state_0 = state
-        # Increment turn
-        self.turns += 1
-
-    def get_learning_rate(self):
-        func, new_step = self.get_new_step(self.learning_step)
-        return func(self.learning_initial + new_step, self.learning_final)
-
-    def get_explore_rate(self):
-        func, new_step = self.get_new_step(self.explore_step)
-        return func(self.explore_initial + new_step, self.explore_final)
-
-    def get_discount_factor(self):
-        func, new_step = self.get_new_step(self.discount_step)
-        return func(self.discount_initial + new_step, self.discount_final)
-
-    def get_new_step(self, step):
-        func = min if step >= 0 else max
-        next_step = step * self.episodes
+            # Get Q-value changes
+            delta = self.get_delta(agents, main_table, secondary_table, state_0, actions, rewards, states)
+            # Update Q-tables and Q-table sums
+            if not traced:
+                self.tables.add(agents, main_table, state_0, actions, delta)
+            else:
+                self.update_traces(actions, delta)
+
+        # Mirrored transitions after traced update
+        if mirrored is not None: self.mirror_update(*mirrored)
+
+    def mirror_update(self, state_0, actions, rewards, states):
+        # Update dense Float64 Q-tables with fused kernel
+        if self.fused:
+            kernels.td_update(np.asarray(self.tables.q_tables), np.asarray(self.tables.q_sum), self.agents,
+                              self.main_table, self.secondary_table, state_0, states, actions, rewards,
+                              self.get_learning_rates(self.agents, state_0, actions), self.discount_factor)
+            return
+        # Get Q-value changes of mirrored transitions
+        delta = self.get_delta(self.agents, self.main_table, self.secondary_table, state_0, actions, rewards, states)
+        # Update Q-tables and Q-table sums
+        self.tables.add(self.agents, self.main_table, state_0, actions, delta)
+
+    def action_backups(self, agents, state_0, actions, rewards, states):
+        # Get Q-value changes of simulated actions
+        main_table, secondary_table = self.main_table[agents], self.secondary_table[agents]
+        delta = self.get_delta(agents, main_table, secondary_table, state_0, actions, rewards, states)
+        # Update Q-tables and Q-table sums
+        self.tables.add(agents, main_table, state_0, actions, delta)
+
+    def get_delta(self, agents, main_table, secondary_table, state_0, actions, rewards, states):
+        # Get best actions from main Q-tables
+        best_actions = np.argmax(self.tables.table_rows(agents, main_table, states), axis=1)
+        # Get best Q-values from secondary Q-tables
+        best_q = self.tables.values(agents, secondary_table, states, best_actions)
+        # Get Q-value changes
+        q_values = self.tables.values(agents, main_table, state_0, actions)
+        learning_rates = self.get_learning_rates(agents, state_0, actions)
+        return learning_rates * (rewards + self.discount_factor[agents] * best_q - q_values)
+
+    def get_learning_rates(self, agents, state_0, actions):
+        # Scheduled learning rates
+        if not self.visit_learning: return self.learning_rate[agents]
+        # 1/N learning rates of state-actions down to lowest scheduled rate
+        visits = self.tables.visit_counts(agents, state_0)[np.arange(len(agents)), actions]
+        return np.maximum(1 / np.maximum(visits, 1), np.minimum(self.learning_initial, self.learning_final)[agents])
+
+    def replay_update(self):
+        # Sample minibatch of stored transitions
+        agents, state_0, actions, rewards, states = self.replay.sample()
+        # Update Q-tables with minibatch
+        self.batch_update(agents, state_0, actions, rewards, states, self.replay.generators)
+
+    def batch_update(self, agents, state_0, actions, rewards, states, generators):
+        # Select main and secondary Q-tables
+        main_table = np.zeros(len(agents), dtype=int)
+        secondary_table = np.zeros(len(agents), dtype=int)
+        if self.num_q_table > 1:
+            # Tables of each agent's transitions from agent streams
+            counts = np.bincount(agents, minlength=self.num_agents)
+            main_table = agent_draws(generators, counts,
+                                     lambda generator, size: generator.integers(0, self.num_q_table, size))
+            offset = agent_draws(generators, counts,
+                                 lambda generator, size: generator.integers(1, self.num_q_table, size))
+            secondary_table = (main_table + offset) % self.num_q_table
+
+        # Scatter Q-value changes into Q-tables
+        delta = self.get_delta(agents, main_table, secondary_table, state_0, actions, rewards, states)
+        self.tables.add(agents, main_table, state_0, actions, delta)
+
+    def update_traces(self, actions, delta):
+        # Watkins traces end after exploratory actions
+        self.traces.clear(~self.greedy)
+        # Add visited state-actions to traces
+        self.traces.visit(self.main_table, self.state_0, actions)
+        # Update Q-tables of all traced state-actions
+        self.tables.add(*self.traces.entries(delta))
+        # Decay and prune traces
+        self.traces.decay(self.discount_factor)
+
+    def save_state(self, agents, states):
+        # Save old states
+        self.state_0[agents] = states
+        # Increment turns
+        self.turns[agents] += 1
+
+    def get_learning_rate(self, agents, episodes):
+        func, new_step = self.get_new_step(self.learning_step[agents], episodes)
+        return func(self.learning_initial[agents] + new_step, self.learning_final[agents])
+
+    def get_explore_rate(self, agents, episodes):
+        func, new_step = self.get_new_step(self.explore_step[agents], episodes)
+        return func(self.explore_initial[agents] + new_step, self.explore_final[agents])
+
+    def get_discount_factor(self, agents, episodes):
+        func, new_step = self.get_new_step(self.discount_step[agents], episodes)
+        return func(self.discount_initial[agents] + new_step, self.discount_final[agents])
+
+    def get_new_step(self, step, episodes):
+        # Increasing schedules stop at final value and decreasing schedules stop above it
+        func = lambda value, final: np.where(step >= 0, np.minimum(value, final), np.maximum(value, final))
+        next_step = step * episodes
         return func, next_step
 
     def check_step_sign(self):
         # Change step sign if initial greater than final value
-        if self.learning_initial > self.learning_final: self.learning_step = -abs(self.learning_step)
-        if self.explore_initial > self.explore_final: self.explore_step = -abs(self.explore_step)
-        if self.discount_initial > self.discount_final: self.discount_step = -abs(self.discount_step)
+        self.learning_step = np.where(self.learning_initial > self.learning_final,
+                                      -abs(self.learning_step), self.learning_step)
+        self.explore_step = np.where(self.explore_initial > self.explore_final,
+                                     -abs(self.explore_step), self.explore_step)
+        self.discount_step = np.where(self.discount_initial > self.discount_final,
+                                      -abs(self.discount_step), self.discount_step)
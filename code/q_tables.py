@@ -0,0 +1,518 @@
+import queue
+import threading
+import numpy as np
+
+from .curriculum import upsample_grid
+
+# Q-table entries of one agent above which the sparse backend is used
+SPARSE_THRESHOLD = 2 ** 25
+# Q-table entries of spare Q-tables pre-generated for next runs
+SPARE_ENTRIES = 2 ** 26
+
+# Q-table and Q-table sum types of each precision
+PRECISION_TYPES = {
+    "Float64": (np.float64, np.float64),
+    "Float32": (np.float32, np.float32),
+    "Float16": (np.float16, np.float32),
+    "Int16": (np.int16, np.int32)
+}
+
+# Scale of fixed-point Q-values (8 fractional bits)
+FIXED_POINT_SCALE = 256
+
+
+def create_tables(num_agents, num_q_table, buckets, random_type, precision, seed_sequences):
+    # Get number of entries in Q-tables of one agent
+    table_size = num_q_table * int(np.prod(buckets))
+    # Use sparse tables for large state spaces whatever the number of agents
+    if table_size > SPARSE_THRESHOLD:
+        return SparseTables(num_agents, num_q_table, buckets, random_type, precision, seed_sequences)
+    else:
+        return DenseTables(num_agents, num_q_table, buckets, random_type, precision, seed_sequences)
+
+
+def initial_values(random_type, shape, generator):
+    # Assign Q-table value
+    if random_type == "None":
+        # Generate arrays of 0s
+        return np.zeros(shape)
+    elif random_type == "Normal":
+        # Generate arrays with normal distribution
+        temp_table = generator.standard_normal(shape) * (10 / 3)
+        # Bound arrays to range
+        return np.clip(temp_table, -10, 10)
+    else:
+        # Generate arrays with uniform distribution
+        return generator.uniform(-10, 10, shape)
+
+
+def fill_values(random_type, out, generator):
+    # Fill array with normal distribution
+    if random_type == "Normal":
+        generator.standard_normal(out=out)
+        out *= 10 / 3
+        # Bound array to range
+        np.clip(out, -10, 10, out=out)
+    else:
+        # Fill array with uniform distribution
+        generator.random(out=out)
+        out *= 20
+        out -= 10
+
+
+def store_values(values, dtype):
+    # Float types are cast directly
+    if not np.issubdtype(dtype, np.integer):
+        return values.astype(dtype)
+    # Integer types are rounded and saturated
+    limits = np.iinfo(dtype)
+    return np.clip(np.rint(values), limits.min, limits.max).astype(dtype)
+
+
+def saturating_add(table, index, delta):
+    # Combine changes to the same entries
+    flat_index = np.ravel_multi_index(index, table.shape)
+    flat_index, inverse = np.unique(flat_index, return_inverse=True)
+    delta = np.bincount(inverse.ravel(), weights=delta, minlength=len(flat_index))
+    # Add changes with rounding and saturation of table type
+    old_values = table.flat[flat_index]
+    new_values = store_values(old_values + delta, table.dtype)
+    table.flat[flat_index] = new_values
+    # Return changed entries and actual changes
+    return np.unravel_index(flat_index, table.shape), new_values.astype(float) - old_values
+
+
+class QTables:
+    def __init__(self, num_q_table, buckets, random_type, precision):
+        # Table settings
+        self.num_q_table = num_q_table
+        self.buckets = buckets
+        self.random_type = random_type
+
+        # Table precision
+        self.table_type, self.sum_type = PRECISION_TYPES[precision]
+        self.scale = FIXED_POINT_SCALE if np.issubdtype(self.table_type, np.integer) else 1
+        self.exact = self.table_type == np.float64
+
+        # Visit count of each state-action
+        self.visits = None
+
+    def store(self, values):
+        # Convert Q-values to table type
+        return store_values(values * self.scale, self.table_type)
+
+    def check_checkpoint(self, header, arrays, backend, shape):
+        # Checkpoint must match table backend, precision and shape
+        q_tables = arrays["q_tables"]
+        if header["backend"] != backend or q_tables.dtype != self.table_type or q_tables.shape[1:] != shape:
+            raise ValueError("Checkpoint does not match %s Q-tables of shape %s" % (backend, shape))
+
+    def update(self, q_tables, q_sum, index, delta):
+        # Double precision tables can be updated directly
+        if self.exact:
+            np.add.at(q_tables, index, delta)
+            np.add.at(q_sum, index[:1] + index[2:], delta)
+        else:
+            # Update Q-tables with rounding and saturation
+            index, changes = saturating_add(q_tables, index, delta * self.scale)
+            # Update Q-table sums with actual changes
+            np.add.at(q_sum, index[:1] + index[2:], changes.astype(self.sum_type))
+
+
+class TableGenerator:
+    def __init__(self, q_tables, seed_sequences):
+        # Table settings
+        self.q_tables = q_tables
+        # Random stream of each agent
+        self.generators = [np.random.default_rng(agent_seed) for agent_seed in seed_sequences]
+
+        # Buffers for random values of background thread and of agents without spare Q-tables
+        self.values = np.empty((q_tables.num_q_table,) + q_tables.buckets)
+        self.agent_values = np.empty_like(self.values)
+        # Spare next run's Q-tables of first agents within pool size
+        num_spares = min(len(self.generators), max(1, SPARE_ENTRIES // self.values.size))
+        self.spares = np.empty((num_spares,) + self.values.shape, dtype=q_tables.table_type)
+
+        # Agents to generate spare Q-tables for and event of each spare being ready
+        self.requests = queue.Queue()
+        self.ready = [threading.Event() for _ in range(num_spares)]
+
+        # Generate Q-tables in background
+        self.thread = threading.Thread(target=self.generate_tables, daemon=True)
+        self.thread.start()
+        for agent in range(num_spares): self.requests.put(agent)
+
+    def generate_tables(self):
+        # Loop until closed
+        while True:
+            # Wait for request
+            agent = self.requests.get()
+            if agent is None: break
+            # Generate next run's Q-tables of agent into its spare buffer
+            fill_values(self.q_tables.random_type, self.values, self.generators[agent])
+            self.spares[agent] = self.q_tables.store(self.values)
+            self.ready[agent].set()
+
+    def next_tables(self, out, agent):
+        # Agents outside pool generate from agent stream in place
+        if agent >= len(self.spares):
+            fill_values(self.q_tables.random_type, self.agent_values, self.generators[agent])
+            np.copyto(out, self.q_tables.store(self.agent_values))
+            return
+
+        # Wait for spare Q-tables of agent
+        self.ready[agent].wait()
+        self.ready[agent].clear()
+        # Copy spare Q-tables and request next ones of agent
+        np.copyto(out, self.spares[agent])
+        self.requests.put(agent)
+
+    def close(self):
+        # Wake thread to stop and wait for it
+        self.requests.put(None)
+        self.thread.join()
+
+    def checkpoint(self):
+        # Wait for all spare Q-tables
+        for ready in self.ready: ready.wait()
+        # Return random stream states and spare Q-tables
+        state = {"generators": [generator.bit_generator.state for generator in self.generators]}
+        return state, self.spares.copy()
+
+    def restore(self, state, spares):
+        # Wait for all spare Q-tables
+        for ready in self.ready: ready.wait()
+        # Restore random stream states and spare Q-tables
+        for generator, generator_state in zip(self.generators, state["generators"]):
+            generator.bit_generator.state = generator_state
+        np.copyto(self.spares, spares)
+
+
+class DenseTables(QTables):
+    def __init__(self, num_agents, num_q_table, buckets, random_type, precision, seed_sequences):
+        # Unpack table settings
+        super().__init__(num_q_table, buckets, random_type, precision)
+
+        # Q-tables and Q-table sums
+        self.q_tables = np.empty((num_agents, num_q_table) + buckets, dtype=self.table_type)
+        self.q_sum = np.empty((num_agents,) + buckets, dtype=self.sum_type)
+
+        # Pre-generate random Q-tables in background
+        self.table_generator = None if random_type == "None" else TableGenerator(self, seed_sequences)
+
+        # Q-tables to warm start from
+        self.warm_tables = None
+
+    def reset(self, agents):
+        # Loop through agents to reset
+        for agent in agents:
+            # Refill Q-tables in place
+            if self.warm_tables is not None:
+                np.copyto(self.q_tables[agent], self.warm_tables[agent % len(self.warm_tables)])
+            elif self.table_generator is None:
+                self.q_tables[agent].fill(0)
+            else:
+                self.table_generator.next_tables(self.q_tables[agent], agent)
+            # Sum of all Q-tables
+            np.sum(self.q_tables[agent], axis=0, dtype=self.sum_type, out=self.q_sum[agent])
+            # Clear visit counts
+            if self.visits is not None: self.visits[agent] = 0
+
+    def track_visits(self):
+        # Compact visit count of each state-action
+        self.visits = np.zeros(self.q_sum.shape, dtype=np.uint32)
+
+    def close(self):
+        # Stop pre-generating Q-tables
+        if self.table_generator is not None: self.table_generator.close()
+
+    def visit_counts(self, agents, states):
+        # Return visit count rows
+        return self.visits[agents, states]
+
+    def upsample(self, agents, coarse_state, fine_state, interpolation):
+        # Loop through agents to refine
+        for agent in agents:
+            # Coarse Q-table rows as grid
+            coarse_tables = self.q_tables[agent, :, :int(np.prod(coarse_state))] / self.scale
+            coarse_tables = coarse_tables.reshape((self.num_q_table,) + tuple(coarse_state) + (-1,))
+            # Interpolate onto fine grid
+            fine_tables = upsample_grid(coarse_tables, coarse_state, fine_state, interpolation)
+            self.q_tables[agent] = self.store(fine_tables.reshape(self.q_tables[agent].shape))
+            # Sum of all Q-tables
+            np.sum(self.q_tables[agent], axis=0, dtype=self.sum_type, out=self.q_sum[agent])
+            # Clear visit counts of coarse states
+            if self.visits is not None: self.visits[agent] = 0
+
+    def add_visits(self, agents, states, actions):
+        # Count state-action visits
+        np.add.at(self.visits, (agents, states, actions), 1)
+
+    def sum_rows(self, agents, states):
+        # Return Q-table sum rows
+        return self.q_sum[agents, states] / self.scale
+
+    def table_rows(self, agents, tables, states):
+        # Return Q-table rows
+        return self.q_tables[agents, tables, states] / self.scale
+
+    def values(self, agents, tables, states, actions):
+        # Return Q-values
+        return self.q_tables[agents, tables, states, actions] / self.scale
+
+    def add(self, agents, tables, states, actions, delta):
+        # Update Q-tables and Q-table sums
+        self.update(self.q_tables, self.q_sum, (agents, tables, states, actions), delta)
+
+    def checkpoint(self, agents, experiment=False):
+        # Header and arrays of agent Q-tables
+        header = {"backend": "Dense"}
+        arrays = {"q_tables": self.q_tables[agents], "q_sum": self.q_sum[agents]}
+        if self.visits is not None: arrays["visits"] = self.visits[agents]
+        # Experiments resume with random stream and spare Q-tables of next run
+        if self.table_generator is not None and experiment:
+            header["table_generator"], arrays["spare_tables"] = self.table_generator.checkpoint()
+        # Return header and arrays
+        return header, arrays
+
+    def restore(self, header, arrays):
+        # Check checkpoint matches Q-tables
+        self.check_checkpoint(header, arrays, "Dense", (self.num_q_table,) + self.buckets)
+        # Use memory-mapped Q-tables
+        self.q_tables, self.q_sum = arrays["q_tables"], arrays["q_sum"]
+        if self.visits is not None and "visits" in arrays: self.visits = arrays["visits"]
+        # Restore random stream and spare Q-tables of experiment
+        if self.table_generator is not None and "table_generator" in header:
+            self.table_generator.restore(header["table_generator"], arrays["spare_tables"])
+
+    def warm_start(self, header, arrays):
+        # Check checkpoint matches Q-tables
+        self.check_checkpoint(header, arrays, "Dense", (self.num_q_table,) + self.buckets)
+        # Copy memory-mapped Q-tables at each new run
+        self.warm_tables = arrays["q_tables"]
+
+
+class SparseTables(QTables):
+    def __init__(self, num_agents, num_q_table, buckets, random_type, precision, seed_sequences):
+        # Unpack table settings
+        super().__init__(num_q_table, buckets, random_type, precision)
+        self.num_action = buckets[1]
+
+        # Row slots of visited states
+        self.slot_maps = [{} for _ in range(num_agents)]
+        self.free_slots = []
+        self.num_slots = 0
+
+        # Q-table and Q-table sum rows
+        self.q_tables = np.empty((1024, num_q_table, self.num_action), dtype=self.table_type)
+        self.q_sum = np.empty((1024, self.num_action), dtype=self.sum_type)
+
+        # Random stream of each agent
+        self.generators = [np.random.default_rng(agent_seed) for agent_seed in seed_sequences]
+
+        # Rows to warm start from
+        self.warm_maps = None
+        self.warm_tables = None
+
+    def reset(self, agents):
+        # Loop through agents to reset
+        for agent in agents:
+            # Free rows of visited states
+            self.free_slots.extend(self.slot_maps[agent].values())
+            self.slot_maps[agent].clear()
+
+    def get_slots(self, agents, states):
+        # Row slots
+        slots = np.empty(len(states), dtype=int)
+        # Loop through agent states
+        for index, (agent, state) in enumerate(zip(agents.tolist(), states.tolist())):
+            # Get row slot or create new row on first visit
+            slot = self.slot_maps[agent].get(state)
+            slots[index] = self.new_row(agent, state) if slot is None else slot
+        # Return row slots
+        return slots
+
+    def new_row(self, agent, state):
+        # Reuse free slot or append new slot
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = self.num_slots
+            self.num_slots += 1
+            # Double row storage when full
+            if slot >= len(self.q_tables): self.grow_rows()
+
+        # Get warm start row of state
+        warm_slot = None if self.warm_maps is None else self.warm_maps[agent % len(self.warm_maps)].get(state)
+
+        # Initialise rows from warm start or agent random stream
+        if warm_slot is not None:
+            self.q_tables[slot] = self.warm_tables[warm_slot]
+        else:
+            shape = (self.num_q_table, self.num_action)
+            self.q_tables[slot] = self.store(initial_values(self.random_type, shape, self.generators[agent]))
+        np.sum(self.q_tables[slot], axis=0, dtype=self.sum_type, out=self.q_sum[slot])
+        if self.visits is not None: self.visits[slot] = 0
+
+        # Save and return slot
+        self.slot_maps[agent][state] = slot
+        return slot
+
+    def grow_rows(self):
+        # Double Q-table and Q-table sum rows
+        self.q_tables = np.concatenate([self.q_tables, np.empty_like(self.q_tables)])
+        self.q_sum = np.concatenate([self.q_sum, np.empty_like(self.q_sum)])
+        if self.visits is not None: self.visits = np.concatenate([self.visits, np.empty_like(self.visits)])
+
+    def track_visits(self):
+        # Compact visit count of each row
+        self.visits = np.zeros(self.q_sum.shape, dtype=np.uint32)
+
+    def close(self):
+        # Rows are generated on first visit
+        pass
+
+    def visit_counts(self, agents, states):
+        # Return visit count rows
+        return self.visits[self.get_slots(agents, states)]
+
+    def add_visits(self, agents, states, actions):
+        # Count state-action visits
+        np.add.at(self.visits, (self.get_slots(agents, states), actions), 1)
+
+    def sum_rows(self, agents, states):
+        # Return Q-table sum rows
+        return self.q_sum[self.get_slots(agents, states)] / self.scale
+
+    def table_rows(self, agents, tables, states):
+        # Return Q-table rows
+        return self.q_tables[self.get_slots(agents, states), tables] / self.scale
+
+    def values(self, agents, tables, states, actions):
+        # Return Q-values
+        return self.q_tables[self.get_slots(agents, states), tables, actions] / self.scale
+
+    def add(self, agents, tables, states, actions, delta):
+        # Update Q-tables and Q-table sums
+        slots = self.get_slots(agents, states)
+        self.update(self.q_tables, self.q_sum, (slots, tables, actions), delta)
+
+    def checkpoint(self, agents, experiment=False):
+        # Visited states of agents
+        slot_agents, slot_states, slots = [], [], []
+        for index, agent in enumerate(agents):
+            slot_map = self.slot_maps[agent]
+            slot_agents += [index] * len(slot_map)
+            slot_states += list(slot_map.keys())
+            slots += list(slot_map.values())
+
+        # Header with random stream of each agent
+        header = {"backend": "Sparse",
+                  "table_generators": [self.generators[agent].bit_generator.state for agent in agents]}
+        # Arrays of visited rows
+        arrays = {"slot_agents": np.array(slot_agents, dtype=int), "slot_states": np.array(slot_states, dtype=int),
+                  "q_tables": self.q_tables[slots], "q_sum": self.q_sum[slots]}
+        if self.visits is not None: arrays["visits"] = self.visits[slots]
+
+        # Return header and arrays
+        return header, arrays
+
+    def restore(self, header, arrays):
+        # Check checkpoint matches Q-tables
+        self.check_checkpoint(header, arrays, "Sparse", (self.num_q_table, self.num_action))
+
+        # Copy visited rows into row storage
+        self.num_slots = len(arrays["slot_states"])
+        self.free_slots = []
+        while len(self.q_tables) < self.num_slots: self.grow_rows()
+        self.q_tables[:self.num_slots] = arrays["q_tables"]
+        self.q_sum[:self.num_slots] = arrays["q_sum"]
+        if self.visits is not None and "visits" in arrays: self.visits[:self.num_slots] = arrays["visits"]
+
+        # Rebuild row slots of visited states
+        for slot_map in self.slot_maps: slot_map.clear()
+        for slot, (agent, state) in enumerate(zip(arrays["slot_agents"].tolist(), arrays["slot_states"].tolist())):
+            self.slot_maps[agent][state] = slot
+
+        # Restore random stream of each agent
+        for generator, state in zip(self.generators, header["table_generators"]):
+            generator.bit_generator.state = state
+
+    def warm_start(self, header, arrays):
+        # Check checkpoint matches Q-tables
+        self.check_checkpoint(header, arrays, "Sparse", (self.num_q_table, self.num_action))
+
+        # Row slots of visited states in checkpoint
+        self.warm_maps = [{} for _ in header["table_generators"]]
+        for slot, (agent, state) in enumerate(zip(arrays["slot_agents"].tolist(), arrays["slot_states"].tolist())):
+            self.warm_maps[agent][state] = slot
+
+        # Copy memory-mapped rows on first visit
+        self.warm_tables = arrays["q_tables"]
+
+
+class TiledTables:
+    def __init__(self, tables, num_tilings):
+        # Q-tables holding tile weights
+        self.tables = tables
+        self.num_tilings = num_tilings
+
+    def tile_index(self, states, *indices):
+        # Repeat indices for active tile of each tiling
+        return [np.repeat(index, self.num_tilings) for index in indices] + [np.ravel(states)]
+
+    def reset(self, agents):
+        # Reset tile weights of agents
+        self.tables.reset(agents)
+
+    def sum_rows(self, agents, states):
+        # Return sum of active tile weight rows
+        agents, tiles = self.tile_index(states, agents)
+        return self.tables.sum_rows(agents, tiles).reshape(states.shape + (-1,)).sum(axis=-2)
+
+    def table_rows(self, agents, tables, states):
+        # Return sum of active tile weight rows
+        agents, tables, tiles = self.tile_index(states, agents, tables)
+        return self.tables.table_rows(agents, tables, tiles).reshape(states.shape + (-1,)).sum(axis=-2)
+
+    def values(self, agents, tables, states, actions):
+        # Return sum of active tile weights
+        agents, tables, actions, tiles = self.tile_index(states, agents, tables, actions)
+        return self.tables.values(agents, tables, tiles, actions).reshape(states.shape).sum(axis=-1)
+
+    def add(self, agents, tables, states, actions, delta):
+        # Share Q-value changes between active tiles
+        agents, tables, actions, delta, tiles = self.tile_index(states, agents, tables, actions, delta / self.num_tilings)
+        self.tables.add(agents, tables, tiles, actions, delta)
+
+    def track_visits(self):
+        # Count visits of each tile
+        self.tables.track_visits()
+
+    def close(self):
+        # Close tile weight tables
+        self.tables.close()
+
+    def visit_counts(self, agents, states):
+        # Return mean visit count rows of active tiles
+        agents, tiles = self.tile_index(states, agents)
+        return self.tables.visit_counts(agents, tiles).reshape(states.shape + (-1,)).mean(axis=-2)
+
+    def add_visits(self, agents, states, actions):
+        # Count visits of active tiles
+        agents, actions, tiles = self.tile_index(states, agents, actions)
+        self.tables.add_visits(agents, tiles, actions)
+
+    def checkpoint(self, agents, experiment=False):
+        # Return header and arrays of tile weights
+        header, arrays = self.tables.checkpoint(agents, experiment)
+        header["num_tilings"] = self.num_tilings
+        return header, arrays
+
+    def restore(self, header, arrays):
+        # Restore tile weights
+        self.tables.restore(header, arrays)
+
+    def warm_start(self, header, arrays):
+        # Warm start tile weights
+        self.tables.warm_start(header, arrays)
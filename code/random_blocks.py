@@ -0,0 +1,36 @@
+import numpy as np
+
+# Number of steps drawn in each block
+BLOCK_SIZE = 4096
+
+
+def agent_draws(generators, counts, draw_function):
+    # Draws of each agent from own random stream in agent order
+    return np.concatenate([draw_function(generator, count) for generator, count in zip(generators, counts)])
+
+
+class RandomBlock:
+    def __init__(self, generators, draw_function, dtype, block_size=BLOCK_SIZE):
+        # Random stream of each agent
+        self.generators = generators
+        self.draw_function = draw_function
+
+        # Block of draws for each step and agent
+        self.block = np.empty((block_size, len(generators)), dtype=dtype)
+        self.cursor = block_size
+
+    def refill(self):
+        # Loop through agent random streams
+        for agent, generator in enumerate(self.generators):
+            # Draw whole block from agent stream
+            self.block[:, agent] = self.draw_function(generator, len(self.block))
+        # Reset cursor
+        self.cursor = 0
+
+    def next_draws(self):
+        # Refill block when exhausted
+        if self.cursor >= len(self.block): self.refill()
+        # Return draws of next step
+        draws = self.block[self.cursor]
+        self.cursor += 1
+        return draws
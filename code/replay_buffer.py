@@ -0,0 +1,65 @@
+import numpy as np
+
+# Arrays of replay buffers
+REPLAY_ARRAYS = ["replay_states", "replay_actions", "replay_rewards", "replay_next_states",
+                 "replay_cursors", "replay_sizes"]
+
+
+class ReplayBuffer:
+    def __init__(self, num_agents, capacity, batch_size, state_shape, seed_sequences):
+        # Buffer settings
+        self.agents = np.arange(num_agents)
+        self.capacity = capacity
+        self.batch_size = batch_size
+        # Random stream of each agent
+        self.generators = [np.random.default_rng(agent_seed) for agent_seed in seed_sequences]
+
+        # Ring buffer of transitions of each agent
+        self.replay_states = np.zeros((num_agents, capacity) + state_shape, dtype=int)
+        self.replay_actions = np.zeros((num_agents, capacity), dtype=int)
+        self.replay_rewards = np.zeros((num_agents, capacity))
+        self.replay_next_states = np.zeros((num_agents, capacity) + state_shape, dtype=int)
+
+        # Next position and number of transitions
+        self.replay_cursors = np.zeros(num_agents, dtype=int)
+        self.replay_sizes = np.zeros(num_agents, dtype=int)
+
+    def clear(self, agents):
+        # Empty buffers of agents
+        self.replay_cursors[agents] = 0
+        self.replay_sizes[agents] = 0
+
+    def add(self, states, actions, rewards, next_states):
+        # Write transitions at cursors
+        cursors = self.replay_cursors
+        self.replay_states[self.agents, cursors] = states
+        self.replay_actions[self.agents, cursors] = actions
+        self.replay_rewards[self.agents, cursors] = rewards
+        self.replay_next_states[self.agents, cursors] = next_states
+
+        # Advance cursors and sizes
+        self.replay_cursors = (cursors + 1) % self.capacity
+        self.replay_sizes = np.minimum(self.replay_sizes + 1, self.capacity)
+
+    def sample(self):
+        # Sample minibatch positions within filled buffers from agent streams
+        draws = np.stack([generator.random(self.batch_size) for generator in self.generators])
+        positions = (draws * self.replay_sizes[:, None]).astype(int)
+        # Flatten agents with transitions
+        agents = np.repeat(self.agents, self.batch_size).reshape(positions.shape)
+        filled = self.replay_sizes[agents] > 0
+        agents, positions = agents[filled], positions[filled]
+
+        # Return sampled transitions
+        return (agents, self.replay_states[agents, positions], self.replay_actions[agents, positions],
+                self.replay_rewards[agents, positions], self.replay_next_states[agents, positions])
+
+    def checkpoint(self, agents):
+        # Return random states and replay arrays of agents
+        states = [self.generators[agent].bit_generator.state for agent in agents]
+        return states, {name: getattr(self, name)[agents] for name in REPLAY_ARRAYS}
+
+    def restore(self, states, arrays):
+        # Restore replay arrays and random states
+        for name in REPLAY_ARRAYS: setattr(self, name, np.array(arrays[name]))
+        for generator, state in zip(self.generators, states): generator.bit_generator.state = state
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def get_tile_counts(num_state):
+    # Offset tilings need an extra tile in each split dimension
+    num_state = np.array(num_state)
+    return num_state + (num_state > 1)
+
+
+def get_state_rows(num_state, num_tilings):
+    # Single tiling uses grid buckets
+    if num_tilings == 1: return int(np.prod(num_state))
+    # Return tiles of all tilings
+    return num_tilings * int(np.prod(get_tile_counts(num_state)))
+
+
+def get_tile_offsets(num_state, num_tilings):
+    # Asymmetric displacement of each tiling in bucket widths
+    displacement = 2 * np.arange(len(num_state)) + 1
+    offsets = (np.arange(num_tilings)[:, None] * displacement / num_tilings) % 1
+    # Dimensions with one bucket are not split
+    return np.where(np.array(num_state) > 1, offsets, 0)
+
+
+def get_tile_strides(num_state, num_tilings):
+    # Strides of tiles within each tiling
+    tile_counts = get_tile_counts(num_state)
+    strides = np.concatenate([np.cumprod(tile_counts[::-1])[-2::-1], [1]])
+    # Start of each tiling
+    return strides, np.arange(num_tilings) * int(np.prod(tile_counts))
+
+
+def tile_states(obv, scaling, offset, tile_offsets, tile_counts, strides, tiling_starts):
+    # Continuous bucket coordinates
+    coordinates = scaling * np.asarray(obv, dtype=float) - offset + 0.5
+    # Tile indices of all tilings at once
+    tile_indices = np.floor(coordinates[..., None, :] + tile_offsets).astype(int)
+    tile_indices = np.clip(tile_indices, 0, tile_counts - 1)
+    # Return flat tile index of each tiling
+    return np.dot(tile_indices, strides) + tiling_starts
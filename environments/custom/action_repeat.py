@@ -0,0 +1,50 @@
+import gym
+import numpy as np
+
+
+class ActionRepeat(gym.Wrapper):
+    def __init__(self, env, repeat):
+        super().__init__(env)
+        # Frames stepped per action
+        self.repeat = repeat
+        # Frames of next action limited by remaining turns
+        self.max_frames = repeat
+
+    def step(self, action):
+        # Repeat action until frame limit or episode end
+        total_reward, frame_obv = 0.0, []
+        while len(frame_obv) < self.max_frames:
+            obv, reward, terminated, truncated, info = self.env.step(action)
+            total_reward += reward
+            frame_obv.append(obv)
+            if terminated or truncated: break
+
+        # Report true frames stepped and observation of each frame padded with last observation
+        frames = len(frame_obv)
+        info["frames"] = frames
+        info["frame_observations"] = np.stack(frame_obv + [obv] * (self.repeat - frames))
+        return obv, total_reward, terminated, truncated, info
+
+
+def make_repeat_env(env_id, repeat, **kwargs):
+    # Make gym env repeating each action
+    env = gym.make(env_id, **kwargs)
+    return ActionRepeat(env, repeat) if repeat > 1 else env
+
+
+def repeat_infos(infos, obv, repeat):
+    # Env copies without frame info stepped one frame
+    frames = np.ones(len(obv), dtype=int)
+    frame_obv = np.repeat(np.asarray(obv)[:, None], repeat, axis=1)
+    # Frames and frame observations of continuing env copies
+    if "_frames" in infos and infos["_frames"].any():
+        continuing = infos["_frames"]
+        frames[continuing] = infos["frames"][continuing]
+        frame_obv[continuing] = np.stack(infos["frame_observations"][continuing])
+    # Frames and frame observations of finished env copies kept in final infos of autoreset
+    if "_final_info" in infos:
+        for index in np.flatnonzero(infos["_final_info"]):
+            frames[index] = infos["final_info"][index]["frames"]
+            frame_obv[index] = infos["final_info"][index]["frame_observations"]
+    # Return frames and observation of each frame of each env copy
+    return frames, frame_obv
@@ -1,5 +1,3 @@
-import random
-
 import gym
 import numpy as np
 import pygame
@@ -45,7 +43,8 @@ class BrickBreakerEnv(gym.Env):
         # Reset ball and paddle
         x_pos = self.np_random.integers(0, 520, dtype=int)
         self.paddle.reset_paddle(x_pos)
-        self.ball.reset_ball(x_pos)
+        # Seeded ball direction so env workers repeat episodes
+        self.ball.reset_ball(x_pos, self.np_random.choice([-1, 1]))
 
         # Reset bricks
         self.bricks.reset_bricks()
@@ -137,9 +136,9 @@ class Ball:
         self.screen_width = screen_width
         self.screen_height = screen_height
 
-    def reset_ball(self, x):
+    def reset_ball(self, x, horizontal):
         # Get ball direction
-        self.horizontal = random.choice([-1, 1])
+        self.horizontal = int(horizontal)
         self.vertical = 1 if self.game_mode else -1
 
         # Create new ball
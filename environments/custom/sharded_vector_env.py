@@ -0,0 +1,167 @@
+import multiprocessing as mp
+import pickle
+import random
+
+import numpy as np
+from gym.vector import SyncVectorEnv, VectorEnv
+from gym.vector.utils import create_shared_memory, read_from_shared_memory
+
+from environments.custom.action_repeat import repeat_infos
+
+# Observation buffers so old observations survive next step
+OBSERVATION_BUFFERS = 2
+
+
+def shared_array(ctx, typecode, dtype, size):
+    # Shared block without lock and numpy view of it
+    block = ctx.Array(typecode, size, lock=False)
+    return block, np.frombuffer(block, dtype=dtype)
+
+
+def shard_worker(env_fns, start, stop, pipe, parent_pipe, blocks, observation_space, num_envs, action_repeat):
+    # Worker only uses own pipe end
+    parent_pipe.close()
+    # Env copies of shard stepped in worker
+    env = SyncVectorEnv(env_fns, copy=False)
+
+    # Views of shared blocks
+    [observation_blocks, reward_block, terminated_block, truncated_block, action_block,
+     frame_block, frame_observation_block, max_frame_block] = blocks
+    observations = [read_from_shared_memory(observation_space, block, num_envs) for block in observation_blocks]
+    rewards = np.frombuffer(reward_block, dtype=np.float64)
+    terminated = np.frombuffer(terminated_block, dtype=np.bool_)
+    truncated = np.frombuffer(truncated_block, dtype=np.bool_)
+    actions = np.frombuffer(action_block, dtype=np.int64)
+    frames = np.frombuffer(frame_block, dtype=np.int64)
+    frame_obv = read_from_shared_memory(observation_space, frame_observation_block, num_envs * action_repeat)
+    frame_obv = frame_obv.reshape((num_envs, action_repeat) + frame_obv.shape[1:])
+    max_frames = np.frombuffer(max_frame_block, dtype=np.int64)
+
+    while True:
+        command, data = pipe.recv()
+        if command == "reset":
+            # Seed shard env copies from first copy seed
+            seed, buffer = data
+            observations[buffer][start:stop], _ = env.reset(seed=seed)
+        elif command == "step":
+            # Action repeat envs stop at frame limits of shard
+            if action_repeat > 1: env.set_attr("max_frames", max_frames[start:stop].tolist())
+            # Write step results of shard into shared blocks
+            observations[data][start:stop], rewards[start:stop], terminated[start:stop], \
+                truncated[start:stop], infos = env.step(actions[start:stop])
+            # Frames and frame observations of action repeat envs
+            if action_repeat > 1:
+                frames[start:stop], frame_obv[start:stop] = repeat_infos(infos, observations[data][start:stop],
+                                                                         action_repeat)
+        elif command == "get_state":
+            # Send pickled env copies and global random states of worker
+            pipe.send(pickle.dumps([env, random.getstate(), np.random.get_state()]))
+            continue
+        elif command == "set_state":
+            # Replace env copies and global random states of worker
+            env, random_state, numpy_state = pickle.loads(data)
+            random.setstate(random_state)
+            np.random.set_state(numpy_state)
+        elif command == "close":
+            env.close()
+            pipe.send(None)
+            break
+        # Signal shard done
+        pipe.send(None)
+
+
+class ShardedVectorEnv(VectorEnv):
+    def __init__(self, env_fn, num_envs, num_workers, action_repeat=1):
+        # Spaces of single env copy
+        env = env_fn()
+        super().__init__(num_envs, env.observation_space, env.action_space)
+        env.close()
+
+        # Shared blocks written by workers and read by learner
+        ctx = mp.get_context()
+        observation_blocks = [create_shared_memory(self.single_observation_space, num_envs, ctx)
+                              for _ in range(OBSERVATION_BUFFERS)]
+        self.observations = [read_from_shared_memory(self.single_observation_space, block, num_envs)
+                             for block in observation_blocks]
+        reward_block, self.rewards = shared_array(ctx, "d", np.float64, num_envs)
+        terminated_block, self.terminated = shared_array(ctx, "b", np.bool_, num_envs)
+        truncated_block, self.truncated = shared_array(ctx, "b", np.bool_, num_envs)
+        action_block, self.actions = shared_array(ctx, "q", np.int64, num_envs)
+        # Frames, frame observations and frame limits of action repeat envs
+        self.action_repeat = action_repeat
+        frame_block, self.frames = shared_array(ctx, "q", np.int64, num_envs)
+        frame_observation_block = create_shared_memory(self.single_observation_space, num_envs * action_repeat, ctx)
+        self.frame_observations = read_from_shared_memory(self.single_observation_space, frame_observation_block,
+                                                          num_envs * action_repeat)
+        self.frame_observations = self.frame_observations.reshape((num_envs, action_repeat) +
+                                                                  self.frame_observations.shape[1:])
+        max_frame_block, self.max_frames = shared_array(ctx, "q", np.int64, num_envs)
+        self.max_frames[:] = action_repeat
+        blocks = [observation_blocks, reward_block, terminated_block, truncated_block, action_block,
+                  frame_block, frame_observation_block, max_frame_block]
+        # Buffer of latest observations
+        self.buffer = 0
+
+        # Split env copies into shards of workers
+        num_workers = min(num_workers, num_envs)
+        self.bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+
+        # Start worker of each shard
+        self.pipes, self.processes = [], []
+        for start, stop in zip(self.bounds[:-1], self.bounds[1:]):
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(target=shard_worker, daemon=True,
+                                  args=([env_fn] * (stop - start), start, stop, child_pipe, parent_pipe,
+                                        blocks, self.single_observation_space, num_envs, action_repeat))
+            process.start()
+            child_pipe.close()
+            self.pipes.append(parent_pipe)
+            self.processes.append(process)
+
+    def reset_async(self, seed=None, options=None):
+        # Reset into first buffer
+        self.buffer = 0
+        # Shards seed env copies like gym vector envs
+        for start, pipe in zip(self.bounds, self.pipes):
+            pipe.send(("reset", (None if seed is None else seed + int(start), self.buffer)))
+
+    def reset_wait(self, seed=None, options=None):
+        # Wait for all shards
+        for pipe in self.pipes: pipe.recv()
+        # Return view of shared observations
+        return self.observations[self.buffer], {}
+
+    def step_async(self, actions):
+        # Write actions into shared block
+        self.actions[:] = actions
+        # Step into other buffer
+        self.buffer = (self.buffer + 1) % OBSERVATION_BUFFERS
+        for pipe in self.pipes: pipe.send(("step", self.buffer))
+
+    def step_wait(self):
+        # Wait for all shards
+        for pipe in self.pipes: pipe.recv()
+        # Return views of shared blocks
+        infos = {} if self.action_repeat == 1 else {
+            "frames": self.frames, "_frames": np.ones(self.num_envs, dtype=bool),
+            "frame_observations": self.frame_observations, "_frame_observations": np.ones(self.num_envs, dtype=bool)}
+        return self.observations[self.buffer], self.rewards, self.terminated, self.truncated, infos
+
+    def get_state(self):
+        # Pickled state of each shard and latest buffer
+        for pipe in self.pipes: pipe.send(("get_state", None))
+        return [[pipe.recv() for pipe in self.pipes], self.buffer]
+
+    def set_state(self, state):
+        # Restore state of each shard
+        shard_states, self.buffer = state
+        for pipe, shard_state in zip(self.pipes, shard_states): pipe.send(("set_state", shard_state))
+        for pipe in self.pipes: pipe.recv()
+
+    def close_extras(self, **kwargs):
+        # Stop workers still running at exit
+        workers = [(pipe, process) for pipe, process in zip(self.pipes, self.processes) if process.is_alive()]
+        for pipe, _ in workers: pipe.send(("close", None))
+        for pipe, process in workers:
+            pipe.recv()
+            process.join()
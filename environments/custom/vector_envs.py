@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+from gym import spaces
+from gym.utils import seeding
+from gym.vector import VectorEnv
+
+from environments.functions.acrobot_functions import acrobot_dynamics, acrobot_observation, MAX_VEL_1, MAX_VEL_2
+from environments.functions.cartpole_functions import cartpole_dynamics, X_THRESHOLD, THETA_THRESHOLD_RADIANS
+
+
+class NativeVectorEnv(VectorEnv, ABC):
+    def __init__(self, num_envs, observation_space, action_space, state_size, max_episode_steps, action_repeat):
+        super().__init__(num_envs, observation_space, action_space)
+        # Episode limit of time limit wrapper
+        self.max_episode_steps = max_episode_steps
+        # Frames stepped per action
+        self.action_repeat = action_repeat
+        # Frames of next actions limited by remaining turns
+        self.max_frames = np.full(num_envs, action_repeat)
+        self.elapsed_steps = np.zeros(num_envs, dtype=int)
+
+        # Full precision states of all env copies
+        self.states = np.zeros((num_envs, state_size))
+        self.actions = None
+
+        # Random stream of each env copy
+        self.generators = [seeding.np_random(None)[0] for _ in range(num_envs)]
+
+    def reset_wait(self, seed=None, options=None):
+        # Seed env copies like gym vector envs
+        if seed is not None:
+            seeds = seed if isinstance(seed, list) else [seed + index for index in range(self.num_envs)]
+            self.generators = [seeding.np_random(env_seed)[0] for env_seed in seeds]
+
+        # Reset all env copies
+        self.reset_envs(np.arange(self.num_envs))
+        return self.observation(self.states), {}
+
+    def step_async(self, actions):
+        # Save actions of all env copies
+        self.actions = np.asarray(actions)
+
+    def step_wait(self):
+        # Step all env copies in one call
+        self.states, terminated = self.dynamics(self.states, self.actions)
+        rewards = self.rewards(terminated)
+        frames = np.ones(self.num_envs, dtype=int)
+
+        # Time limit truncation
+        self.elapsed_steps += 1
+        truncated = self.elapsed_steps >= self.max_episode_steps
+
+        # Repeat actions on env copies until frame limit or episode end
+        obv = self.observation(self.states)
+        frame_obv = None if self.action_repeat == 1 else np.repeat(obv[:, None], self.action_repeat, axis=1)
+        for frame in range(1, self.action_repeat):
+            live = np.flatnonzero(~(terminated | truncated) & (frames < self.max_frames))
+            if len(live) == 0: break
+            # Step live env copies in one call and accumulate rewards
+            self.states[live], terminated[live] = self.dynamics(self.states[live], self.actions[live])
+            rewards[live] += self.rewards(terminated[live])
+            frames[live] += 1
+            # Observations of frame padded over later frames
+            obv[live] = self.observation(self.states[live])
+            frame_obv[live, frame:] = obv[live, None]
+            # Time limit truncation
+            self.elapsed_steps[live] += 1
+            truncated[live] = self.elapsed_steps[live] >= self.max_episode_steps
+
+        # Report true frames stepped and observation of each frame
+        infos = {} if frame_obv is None else {"frames": frames, "_frames": np.ones(self.num_envs, dtype=bool),
+                                              "frame_observations": frame_obv,
+                                              "_frame_observations": np.ones(self.num_envs, dtype=bool)}
+        # Autoreset finished env copies
+        done = terminated | truncated
+        if done.any():
+            # Keep final observations of finished env copies
+            final_observation = np.full(self.num_envs, None, dtype=object)
+            for index in np.flatnonzero(done): final_observation[index] = obv[index].copy()
+            infos.update({"final_observation": final_observation, "_final_observation": done})
+            # Replace with initial observations
+            self.reset_envs(np.flatnonzero(done))
+            obv[done] = self.observation(self.states[done])
+
+        # Return batched step results
+        return obv, rewards, terminated, truncated, infos
+
+    def get_state(self):
+        # States, elapsed steps and random streams of env copies
+        return [self.states.copy(), self.elapsed_steps.copy(),
+                [generator.bit_generator.state for generator in self.generators]]
+
+    def set_state(self, state):
+        # Restore states, elapsed steps and random streams of env copies
+        [self.states, self.elapsed_steps, generator_states] = state
+        for generator, generator_state in zip(self.generators, generator_states):
+            generator.bit_generator.state = generator_state
+
+    def reset_envs(self, indices):
+        # Draw initial states from env copy random streams
+        for index in indices: self.states[index] = self.initial_state(self.generators[index])
+        self.elapsed_steps[indices] = 0
+
+    @abstractmethod
+    def initial_state(self, generator):
+        """Initial state of one env copy"""
+
+    @abstractmethod
+    def dynamics(self, states, actions):
+        """New states and terminations of all env copies"""
+
+    @abstractmethod
+    def observation(self, states):
+        """Observations of states"""
+
+    @abstractmethod
+    def rewards(self, terminated):
+        """Rewards of all env copies"""
+
+
+class CartPoleVectorEnv(NativeVectorEnv):
+    def __init__(self, num_envs, action_repeat=1):
+        # Spaces of cart pole env
+        high = np.array([X_THRESHOLD * 2, np.finfo(np.float32).max,
+                         THETA_THRESHOLD_RADIANS * 2, np.finfo(np.float32).max], dtype=np.float32)
+        super().__init__(num_envs, spaces.Box(-high, high, dtype=np.float32), spaces.Discrete(2), 4, 500,
+                         action_repeat)
+
+    def initial_state(self, generator):
+        return generator.uniform(low=-0.05, high=0.05, size=(4,))
+
+    def dynamics(self, states, actions):
+        return cartpole_dynamics(states, actions)
+
+    def observation(self, states):
+        return states.astype(np.float32)
+
+    def rewards(self, terminated):
+        return np.ones(len(terminated))
+
+
+class AcrobotVectorEnv(NativeVectorEnv):
+    def __init__(self, num_envs, action_repeat=1):
+        # Spaces of acrobot env
+        high = np.array([1.0, 1.0, 1.0, 1.0, MAX_VEL_1, MAX_VEL_2], dtype=np.float32)
+        super().__init__(num_envs, spaces.Box(-high, high, dtype=np.float32), spaces.Discrete(3), 4, 500,
+                         action_repeat)
+
+    def initial_state(self, generator):
+        return generator.uniform(low=-0.1, high=0.1, size=(4,)).astype(np.float32)
+
+    def dynamics(self, states, actions):
+        return acrobot_dynamics(states, actions)
+
+    def observation(self, states):
+        return acrobot_observation(states)
+
+    def rewards(self, terminated):
+        return np.where(terminated, 0.0, -1.0)
+
+
+# Envs with native vector env
+native_envs = {
+    "CartPole-v1": CartPoleVectorEnv,
+    "Acrobot-v1": AcrobotVectorEnv
+}
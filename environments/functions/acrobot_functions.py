@@ -1,14 +1,26 @@
 import numpy as np
-from numpy import pi, sin, cos, exp
-from gym.envs.classic_control.acrobot import wrap, bound, rk4
+from numpy import pi, sin, cos, exp, arctan2
 from environments.functions.env_functions import EnvFunctions
 
+# Step function constants
+MAX_VEL_1 = 4 * pi
+MAX_VEL_2 = 9 * pi
+AVAIL_TORQUE = np.array([-1.0, 0.0, +1])
+DT = 0.2
 
-def get_average(time_steps):
-    # Number of elements
-    num_elements = min(len(time_steps), 100)
-    # Get average of last 100 elements
-    return sum(time_steps[-num_elements:]) / num_elements
+
+def wrap(x, m, M):
+    # Wrap values around range
+    return np.where((x >= m) & (x <= M), x, m + np.mod(x - m, M - m))
+
+
+def rk4(derivs, y0, dt):
+    # Runge-Kutta step over time interval
+    k1 = derivs(y0)
+    k2 = derivs(y0 + dt / 2.0 * k1)
+    k3 = derivs(y0 + dt / 2.0 * k2)
+    k4 = derivs(y0 + dt * k3)
+    return y0 + dt / 6.0 * (k1 + 2 * k2 + 2 * k3 + k4)
 
 
 def _dsdt(s_augmented):
@@ -21,13 +33,7 @@ def _dsdt(s_augmented):
     I2 = 1.0  #: moments of inertia for both links
     g = 9.8
 
-    a = s_augmented[-1]
-    s = s_augmented[:-1]
-
-    theta1 = s[0]
-    theta2 = s[1]
-    dtheta1 = s[2]
-    dtheta2 = s[3]
+    theta1, theta2, dtheta1, dtheta2, a = np.moveaxis(s_augmented, -1, 0)
 
     d1 = (m1 * lc1 ** 2 + m2 * (l1 ** 2 + lc2 ** 2 + 2 * l1 * lc2 * cos(theta2)) + I1 + I2)
     d2 = m2 * (lc2 ** 2 + l1 * lc2 * cos(theta2)) + I2
@@ -41,78 +47,87 @@ def _dsdt(s_augmented):
             m2 * lc2 ** 2 + I2 - d2 ** 2 / d1)
     ddtheta1 = -(d2 * ddtheta2 + phi1) / d1
 
-    return dtheta1, dtheta2, ddtheta1, ddtheta2, 0.0
+    return np.stack([dtheta1, dtheta2, ddtheta1, ddtheta2, np.zeros_like(a)], axis=-1)
+
+
+def acrobot_dynamics(state, action):
+    torque = AVAIL_TORQUE[action]
+
+    # Now, augment the state with our force action, so it can be passed to _dsdt
+    s_augmented = np.concatenate([state, torque[..., None]], axis=-1).astype(float)
+    ns = np.moveaxis(rk4(_dsdt, s_augmented, DT), -1, 0)
+
+    ns0 = wrap(ns[0], -pi, pi)
+    ns1 = wrap(ns[1], -pi, pi)
+    ns2 = np.clip(ns[2], -MAX_VEL_1, MAX_VEL_1)
+    ns3 = np.clip(ns[3], -MAX_VEL_2, MAX_VEL_2)
+
+    # Termination
+    terminated = -cos(ns0) - cos(ns1 + ns0) > 1.0
+    return np.stack([ns0, ns1, ns2, ns3], axis=-1), terminated
+
+
+def acrobot_observation(state):
+    # Joint angles as cosines and sines with joint velocities
+    theta1, theta2, dtheta1, dtheta2 = np.moveaxis(state, -1, 0)
+    return np.stack([cos(theta1), sin(theta1), cos(theta2), sin(theta2), dtheta1, dtheta2], axis=-1).astype(np.float32)
 
 
 class AcrobotFunctions(EnvFunctions):
     def __init__(self, parameter_settings, _):
         # Unpack parameter settings
         super().__init__(parameter_settings)
-        # Step function constants
-        self.MAX_VEL_1 = 4 * pi
-        self.MAX_VEL_2 = 9 * pi
-        self.AVAIL_TORQUE = [-1.0, 0.0, +1]
         # State bounds
         self.state_bounds = [(-1, 1), (-1, 1), (-1, 1), (-1, 1), (-4 * pi, 4 * pi), (-9 * pi, 9 * pi)]
+        # Bucket mapping
+        self.scaling, self.offset, self.max_buckets = self.bucket_mapping(self.num_state)
+        self.coarse_mapping = self.bucket_mapping(self.coarse_state)
 
     def step_function(self, obv, action):
-        torque = self.AVAIL_TORQUE[action]
+        # Recover joint angles from observation
+        cos1, sin1, cos2, sin2, dtheta1, dtheta2 = np.moveaxis(obv, -1, 0)
+        state = np.stack([arctan2(sin1, cos1), arctan2(sin2, cos2), dtheta1, dtheta2], axis=-1)
 
-        # Now, augment the state with our force action, so it can be passed to _dsdt
-        s_augmented = np.append(obv, torque)
-        ns = rk4(_dsdt, s_augmented, [0, 0.2])
-
-        ns[0] = wrap(ns[0], -pi, pi)
-        ns[1] = wrap(ns[1], -pi, pi)
-        ns[2] = bound(ns[2], -self.MAX_VEL_1, self.MAX_VEL_1)
-        ns[3] = bound(ns[3], -self.MAX_VEL_2, self.MAX_VEL_2)
-
-        # Termination
-        terminated = bool(-cos(ns[0]) - cos(ns[1] + ns[0]) > 1.0)
-        return np.array([cos(ns[0]), sin(ns[0]), cos(ns[1]), sin(ns[1]), ns[2], ns[3]], dtype=np.float32), terminated
+        # Step joint angles and velocities
+        state, terminated = acrobot_dynamics(state, action)
+        return acrobot_observation(state), terminated
 
     def state_to_bucket(self, obv):
-        bucket_indices = []
-        for i in range(len(obv)):
-            if obv[i] <= self.state_bounds[i][0]:
-                bucket_index = 0
-            elif obv[i] >= self.state_bounds[i][1]:
-                bucket_index = self.num_state[i] - 1
-            else:
-                # Mapping the state bounds to the bucket array
-                bound_width = self.state_bounds[i][1] - self.state_bounds[i][0]
-                offset = (self.num_state[i] - 1) * self.state_bounds[i][0] / bound_width
-                scaling = (self.num_state[i] - 1) / bound_width
-                bucket_index = int(round(scaling * obv[i] - offset))
-            bucket_indices.append(bucket_index)
-        return tuple(bucket_indices)
+        # Map state bounds to flat state index
+        return self.grid_to_state(obv)
 
     def action_function(self, q_action):
         # Get actions
         if self.num_action == 2:
             opposite_q_action = 1 - q_action
             action = q_action * 2
-            opposite_action = opposite_q_action * 2 if self.opposition else None
+            opposite_action = opposite_q_action * 2 if self.opposition == "Opposite" else None
         else:
             opposite_q_action = 2 - q_action
             action = q_action
-            opposite_action = opposite_q_action if self.opposition else None
+            opposite_action = opposite_q_action if self.opposition == "Opposite" else None
         # Return actions
         return opposite_q_action, action, opposite_action
 
-    def success_function(self, time_steps, _0, _1):
-        return get_average(time_steps) <= 195.0
+    def symmetry_function(self, obv, q_action):
+        # Mirror joint angles and velocities and swap torque direction
+        return np.asarray(obv) * np.array([1, -1, 1, -1, -1, -1]), self.num_action - 1 - q_action
+
+    def success_function(self, average_steps, _0, _1):
+        return average_steps <= 195.0
 
     def reward_function(self):
 
         # Return base reward
-        def base_reward(_0, terminated, _1): return 0 if terminated else -1
+        def base_reward(_0, terminated, _1): return np.where(terminated, 0, -1)
         # Penalty based on turn
-        def time_penalty(_, terminated, turn): return 0 if terminated else -exp(turn / 200)
+        def time_penalty(_, terminated, turn): return np.where(terminated, 0, -exp(turn / 200))
         # Reward based on velocity
-        def velocity_reward(obv, terminated, _): return 0 if terminated else abs(obv[4] + obv[5]) - 13 * pi
+        def velocity_reward(obv, terminated, _):
+            return np.where(terminated, 0, np.abs(obv[..., 4] + obv[..., 5]) - 13 * pi)
         # Reward based on height
-        def height_reward(obv, terminated, _): return 0 if terminated else obv[1] * obv[3] - obv[0] * (obv[2] + 1) - 2
+        def height_reward(obv, terminated, _):
+            return np.where(terminated, 0, obv[..., 1] * obv[..., 3] - obv[..., 0] * (obv[..., 2] + 1) - 2)
 
         # Use dict to store functions
         functions = {"Base": base_reward, "Time": time_penalty, "Velocity":velocity_reward, "Height": height_reward}
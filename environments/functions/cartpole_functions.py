@@ -2,109 +2,101 @@ import numpy as np
 from numpy import pi, radians, sin, cos, exp, log
 from environments.functions.env_functions import EnvFunctions
 
-
-def get_average(time_steps):
-    # Number of elements
-    num_elements = min(len(time_steps), 100)
-    # Get average of last 100 elements
-    return sum(time_steps[-num_elements:]) / num_elements
+# Step function constants
+GRAVITY = 9.8
+MASSCART = 1.0
+MASSPOLE = 0.1
+LENGTH = 0.5  # actually half the pole's length
+FORCE_MAG = 10.0
+TAU = 0.02  # seconds between state updates
+# Failure threshold
+X_THRESHOLD = 2.4
+THETA_THRESHOLD_RADIANS = pi / 15
 
 
 def future_position(obv):
-    _, _, angle, velocity = obv
+    _, _, angle, velocity = np.moveaxis(obv, -1, 0)
     threshold = pi / 15
     new_angle = angle + 0.02 * velocity
-    terminated = new_angle < -threshold or new_angle > threshold
+    terminated = (new_angle < -threshold) | (new_angle > threshold)
     return new_angle, terminated
 
 
 def angle_reward(obv):
     angle, _ = future_position(obv)
-    return max(pi / 15 - abs(angle), 0)
+    return np.maximum(pi / 15 - np.abs(angle), 0)
+
+
+def cartpole_dynamics(state, action):
+    total_mass = MASSPOLE + MASSCART
+    polemass_length = MASSPOLE * LENGTH
+
+    x, x_dot, theta, theta_dot = np.moveaxis(state, -1, 0)
+    force = np.where(action == 1, FORCE_MAG, -FORCE_MAG)
+    costheta = cos(theta)
+    sintheta = sin(theta)
+
+    temp = (force + polemass_length * theta_dot ** 2 * sintheta) / total_mass
+    thetaacc = (GRAVITY * sintheta - costheta * temp) / (LENGTH * (4.0 / 3.0 - MASSPOLE * costheta ** 2 / total_mass))
+    xacc = temp - polemass_length * thetaacc * costheta / total_mass
+
+    x = x + TAU * x_dot
+    x_dot = x_dot + TAU * xacc
+    theta = theta + TAU * theta_dot
+    theta_dot = theta_dot + TAU * thetaacc
+
+    # Terminated
+    terminated = (
+        (x < -X_THRESHOLD)
+        | (x > X_THRESHOLD)
+        | (theta < -THETA_THRESHOLD_RADIANS)
+        | (theta > THETA_THRESHOLD_RADIANS)
+    )
+
+    # Return new state and termination
+    return np.stack((x, x_dot, theta, theta_dot), axis=-1), terminated
 
 
 class CartpoleFunctions(EnvFunctions):
     def __init__(self, parameter_settings, _):
         # Unpack parameter settings
         super().__init__(parameter_settings)
-        # Step function constants
-        self.gravity = 9.8
-        self.masscart = 1.0
-        self.masspole = 0.1
-        self.length = 0.5  # actually half the pole's length
-        self.force_mag = 10.0
-        # Failure threshold
-        self.x_threshold = 2.4
-        self.theta_threshold_radians = pi / 15
         # State bounds
         self.state_bounds = [(-4.8, 4.8), (-0.5, 0.5), (-radians(24), radians(24)), (-radians(50), radians(50))]
+        # Bucket mapping
+        self.scaling, self.offset, self.max_buckets = self.bucket_mapping(self.num_state)
+        self.coarse_mapping = self.bucket_mapping(self.coarse_state)
 
     def step_function(self, obv, action):
-        total_mass = self.masspole + self.masscart
-        polemass_length = self.masspole * self.length
-        tau = 0.02  # seconds between state updates
-
-        x, x_dot, theta, theta_dot = obv
-        force = self.force_mag if action == 1 else -self.force_mag
-        costheta = cos(theta)
-        sintheta = sin(theta)
-
-        temp = (force + polemass_length * theta_dot ** 2 * sintheta) / total_mass
-        thetaacc = (self.gravity * sintheta - costheta * temp) / (
-                self.length * (4.0 / 3.0 - self.masspole * costheta ** 2 / total_mass))
-        xacc = temp - polemass_length * thetaacc * costheta / total_mass
-
-        x = x + tau * x_dot
-        x_dot = x_dot + tau * xacc
-        theta = theta + tau * theta_dot
-        theta_dot = theta_dot + tau * thetaacc
-
-        # New state
-        obv = (x, x_dot, theta, theta_dot)
-
-        # Terminated
-        terminated = bool(
-            x < -self.x_threshold
-            or x > self.x_threshold
-            or theta < -self.theta_threshold_radians
-            or theta > self.theta_threshold_radians
-        )
-
-        return np.array(obv, dtype=np.float32), terminated
+        # Step cart and pole
+        state, terminated = cartpole_dynamics(obv, action)
+        return state.astype(np.float32), terminated
 
     def state_to_bucket(self, obv):
-        bucket_indices = []
-        for i in range(len(obv)):
-            if obv[i] <= self.state_bounds[i][0]:
-                bucket_index = 0
-            elif obv[i] >= self.state_bounds[i][1]:
-                bucket_index = self.num_state[i] - 1
-            else:
-                # Mapping the state bounds to the bucket array
-                bound_width = self.state_bounds[i][1] - self.state_bounds[i][0]
-                offset = (self.num_state[i] - 1) * self.state_bounds[i][0] / bound_width
-                scaling = (self.num_state[i] - 1) / bound_width
-                bucket_index = int(round(scaling * obv[i] - offset))
-            bucket_indices.append(bucket_index)
-        return tuple(bucket_indices)
+        # Map state bounds to flat state index
+        return self.grid_to_state(obv)
 
     def action_function(self, q_action):
         # Get actions
-        opposite_q_action = 1 - q_action if self.opposition else None
+        opposite_q_action = 1 - q_action if self.opposition == "Opposite" else None
         action = q_action
         opposite_action = opposite_q_action
         # Return actions
         return opposite_q_action, action, opposite_action
 
-    def success_function(self, time_steps, _0, _1):
-        return get_average(time_steps) >= 195.0
+    def symmetry_function(self, obv, q_action):
+        # Mirror cart and pole and swap push direction
+        return -np.asarray(obv), 1 - q_action
+
+    def success_function(self, average_steps, _0, _1):
+        return average_steps >= 195.0
 
     def reward_function(self):
 
         # Return base reward
         def base_reward(_0, _1, _2): return 1
         # Penalise if action leads to termination
-        def termination_penalty(obv, terminated, _): return -1 if terminated or future_position(obv)[1] else 1
+        def termination_penalty(obv, terminated, _): return np.where(terminated | future_position(obv)[1], -1, 1)
         # Exponential reward based on turn
         def time_reward(_0, _1, turn): return exp(turn / 100)
         # Uniform reward based on angle
@@ -1,34 +1,93 @@
+import numpy as np
 from abc import ABC, abstractmethod
+from code.curriculum import get_coarse_state
+from code.kernels import kernels
+from code.tile_coding import get_tile_counts, get_tile_offsets, get_tile_strides, tile_states
+
+
+def get_state_strides(num_state):
+    # Strides of state buckets
+    strides = []
+    num_states = 1
+    # Loop from last to first bucket
+    for buckets in reversed(num_state):
+        # Single bucket dimensions are dropped from table
+        strides.insert(0, num_states if buckets > 1 else 0)
+        num_states *= buckets
+    # Return number of states and strides
+    return num_states, np.array(strides)
 
 
 class EnvFunctions(ABC):
     @abstractmethod
     def __init__(self, parameter_settings):
         """Unpack parameters settings"""
-        [self.num_q_table, self.num_state, self.num_action,
-         self.random_type, self.opposition, self.reward_type] = parameter_settings
+        [self.num_q_table, self.num_state, self.num_tilings, self.num_action, self.random_type,
+         self.precision, self.opposition, self.symmetry, self.reward_type, _, _, _, _, _, _, _,
+         self.coarse_factor, self.refine_episode, _] = parameter_settings
+        """Flatten state buckets into single state index"""
+        self.num_states, self.state_strides = get_state_strides(self.num_state)
+        """Offset tilings of state buckets"""
+        self.tile_counts = get_tile_counts(self.num_state)
+        self.tile_offsets = get_tile_offsets(self.num_state, self.num_tilings)
+        self.tile_strides, self.tiling_starts = get_tile_strides(self.num_state, self.num_tilings)
+        """Coarse state buckets learned before fine buckets"""
+        self.coarse_state = get_coarse_state(self.num_state, self.coarse_factor)
+        self.curriculum = self.coarse_factor > 1 and self.refine_episode > 0
+        _, self.coarse_strides = get_state_strides(self.coarse_state)
         """Define state bounds and constants"""
 
+    def bucket_mapping(self, num_state):
+        # Get lower and upper state bounds
+        lower_bounds, upper_bounds = np.array(self.state_bounds, dtype=float).T
+        # Scale state bounds to bucket array
+        max_buckets = np.array(num_state) - 1
+        scaling = max_buckets / (upper_bounds - lower_bounds)
+        # Return scaling, offset and max bucket
+        return scaling, scaling * lower_bounds, max_buckets
+
+    def bucket_to_state(self, bucket_indices):
+        # Return flat state index
+        return np.dot(bucket_indices, self.state_strides)
+
+    def grid_to_state(self, obv):
+        # Map tiles of each offset tiling
+        if self.num_tilings > 1:
+            return tile_states(obv, self.scaling, self.offset, self.tile_offsets,
+                               self.tile_counts, self.tile_strides, self.tiling_starts)
+        # Map, clip and flatten buckets with selected kernel
+        return kernels.grid_states(obv, self.scaling, self.offset, self.max_buckets, self.state_strides)
+
+    def coarse_to_bucket(self, obv):
+        # Map state bounds to coarse flat state index
+        scaling, offset, max_buckets = self.coarse_mapping
+        return kernels.grid_states(obv, scaling, offset, max_buckets, self.coarse_strides)
+
     def env_functions(self):
         # Returns functions used in environment
         return [self.step_function, self.state_to_bucket, self.action_function,
-                self.success_function, self.reward_function()]
+                self.success_function, self.reward_function(), self.symmetry_function if self.symmetry else None,
+                self.coarse_to_bucket if self.curriculum else None]
 
     @abstractmethod
     def step_function(self, obv, action):
-        """Step function for opposition learning"""
+        """Step function for opposition learning and all-action backups"""
 
     @abstractmethod
     def state_to_bucket(self, obv):
-        """Change observations into state buckets"""
+        """Change observations into flat state index"""
 
     @abstractmethod
     def action_function(self, q_action):
         """Process and return opposite q-action, main and opposite actions"""
 
     @abstractmethod
-    def success_function(self, time_steps, rewards, obv):
-        """Check for success condition after each episode"""
+    def symmetry_function(self, obv, q_action):
+        """Return mirrored observations and q-actions"""
+
+    @abstractmethod
+    def success_function(self, average_steps, average_rewards, obv):
+        """Check for success condition from averages over last 100 episodes after each episode"""
 
     @abstractmethod
     def reward_function(self):
@@ -14,6 +14,8 @@ class AcrobotSettings(EnvSettings):
         parameter_settings = {
             "Q-Tables": ((1, 5, 1), 1),
             "Action": ((2, 3, 1), 3),
+            "Tilings": ((1, 8, 1), 1),
+            "Coarse Factor": ((1, 4, 1), 1),
             "Reward": (reward_list, "Base")
         }
         return parameter_settings
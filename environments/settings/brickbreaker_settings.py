@@ -14,6 +14,8 @@ class BrickBreakerSettings(EnvSettings):
         parameter_settings = {
             "Q-Tables": ((1, 5, 1), 1),
             "Action": ((2, 3, 1), 3),
+            "Tilings": ((1, 1, 1), 1),
+            "Coarse Factor": ((1, 1, 1), 1),
             "Reward": (reward_list, "Constant")
         }
         return parameter_settings
@@ -26,6 +26,8 @@ class EnvSettings(ABC):
         # parameter_settings = {
         #     "Q-Tables": (("Min", "Max", "Increment"), "Default"),
         #     "Action": (("Min", "Max", "Increment"), "Default"),
+        #     "Tilings": (("Min", "Max", "Increment"), "Default"),
+        #     "Coarse Factor": (("Min", "Max", "Increment"), "Default"),
         #     "Reward": (["Option List"], "Default")
         # }
 
@@ -147,16 +147,27 @@ class FrameGUI:
 
         # Get environment settings
         environment_settings = [
-            ("SpinBox", ("Number of Copies", (1, 10, 1), 1)),
+            ("SpinBox", ("Number of Copies", (1, 1000, 1), 1)),
             ("CheckButton", ("Render Mode", "Human", False)),
-            ("Entry", ("Random Seed", "20313854"))
+            ("Entry", ("Random Seed", "20313854")),
+            ("Entry", ("Agent Checkpoint", "")),
+            ("Entry", ("Warm Start", "")),
+            ("OptionMenu", ("Kernel Backend", ["NumPy", "Numba"], "NumPy")),
+            ("OptionMenu", ("Env Backend", ["Native", "Gym", "Sharded"], "Native")),
+            ("SpinBox", ("Env Workers", (1, 16, 1), 1)),
+            ("CheckButton", ("Pipelined Stepping", "Two Halves", False)),
+            ("Entry", ("Experiment Checkpoint", "")),
+            ("SpinBox", ("Checkpoint Interval", (100, 100000, 100), 1000)),
+            ("SpinBox", ("Action Repeat", (1, 16, 1), 1))
         ]
 
         # Get training settings
         training_settings = [
             ("SpinBox", ("Max Runs", (30, 100, 1), 50)),
             ("SpinBox", ("Max Episodes", *run_settings["Episodes"])),
-            ("SpinBox", ("Max Turns", *run_settings["Turns"]))
+            ("SpinBox", ("Max Turns", *run_settings["Turns"])),
+            ("SpinBox", ("Planning Steps", (0, 256, 1), 0)),
+            ("SpinBox", ("Run Workers", (0, 16, 1), 0))
         ]
 
         # Widget lists
@@ -184,12 +195,25 @@ class FrameGUI:
             ("SpinBox", ("Q-Table Number", *parameter_settings["Q-Tables"])),
             ("SpinBox", ("Action Space", *parameter_settings["Action"])),
             ("OptionMenu", ("Q-Table Initialization", ["None", "Normal", "Uniform"], "None")),
-            ("CheckButton", ("Opposition Learning", "Include", False)),
-            ("OptionMenu", ("Reward Function", *parameter_settings["Reward"]))
+            ("OptionMenu", ("Q-Table Precision", ["Float64", "Float32", "Float16", "Int16"], "Float64")),
+            ("OptionMenu", ("Opposition Learning", ["None", "Opposite", "All Actions"], "None")),
+            ("CheckButton", ("Symmetry Augmentation", "Include", False)),
+            ("OptionMenu", ("Reward Function", *parameter_settings["Reward"])),
+            ("Entry", ("Trace Decay", "0")),
+            ("SpinBox", ("Trace Length", (8, 256, 8), 64)),
+            ("SpinBox", ("Replay Capacity", (0, 100000, 1000), 0)),
+            ("SpinBox", ("Replay Batch", (1, 256, 1), 32)),
+            ("SpinBox", ("Replay Interval", (1, 100, 1), 1)),
+            ("CheckButton", ("Visit-Count Learning", "Include", False)),
+            ("Entry", ("Exploration Bonus", "0")),
+            ("SpinBox", ("Coarse Factor", *parameter_settings["Coarse Factor"])),
+            ("SpinBox", ("Refine Episode", (0, 500, 10), 0)),
+            ("OptionMenu", ("Refine Interpolation", ["Nearest", "Linear"], "Linear"))
         ]
 
         # Get state space
         state_space = [("SpinBox", state) for state in state_settings]
+        state_space.append(("SpinBox", ("Tilings", *parameter_settings["Tilings"])))
 
         # Widget lists
         widget_lists = [
@@ -0,0 +1,10 @@
+import sys
+
+# Registers brick breaker environment
+import main
+from code.env_simulation import resume_experiment
+
+if __name__ == '__main__':
+    # Usage: python resume.py [experiment checkpoint]
+    results, total_runs = resume_experiment(sys.argv[1])
+    print("Results = %s, Runs = %d" % (results, total_runs))
@@ -0,0 +1,48 @@
+import numpy as np
+
+from code.q_learning import QLearningBatch, read_checkpoint, write_checkpoint
+
+# Dense random Q-tables with traces and replay
+PARAMETER_SETTINGS = [2, (1, 1, 6, 7), 1, 2, "Normal", "Float64", "None", False, "Base",
+                      0.9, 8, 64, 8, 1, False, 0, 1, 0, "Linear"]
+HYPERPARAMETERS = [0.9, 0.1, 0.004, 0.5, 0.01, 0.002, 0.9, 0.99, 0.001]
+
+
+def train_steps(q_learning, generator, steps):
+    # Random transitions of every agent
+    for _ in range(steps):
+        q_learning.select_tables()
+        actions = q_learning.select_action()
+        states = generator.integers(0, 42, q_learning.num_agents)
+        q_learning.update_table(states, actions, generator.uniform(-1, 1, q_learning.num_agents))
+        q_learning.save_state(q_learning.agents, states)
+
+
+def test_checkpoint_round_trip(tmp_path):
+    # Train agents before checkpoint
+    q_learning = QLearningBatch(PARAMETER_SETTINGS, 3, 0)
+    q_learning.reset_agent(HYPERPARAMETERS)
+    q_learning.new_episode(q_learning.agents, np.zeros(3, dtype=int))
+    train_steps(q_learning, np.random.default_rng(0), 50)
+
+    # Save to checkpoint folder and load into new agents
+    path = str(tmp_path / "agents")
+    write_checkpoint(path, *q_learning.checkpoint(q_learning.agents, True))
+    loaded = QLearningBatch(PARAMETER_SETTINGS, 3, 1)
+    loaded.restore(*read_checkpoint(path, "c"))
+
+    # Tables and counters match
+    assert np.array_equal(loaded.tables.q_tables, q_learning.tables.q_tables)
+    assert np.array_equal(loaded.tables.q_sum, q_learning.tables.q_sum)
+    assert np.array_equal(loaded.episodes, q_learning.episodes)
+    assert np.array_equal(loaded.turns, q_learning.turns)
+
+    # Random states match so both batches keep training the same
+    train_steps(q_learning, np.random.default_rng(1), 50)
+    train_steps(loaded, np.random.default_rng(1), 50)
+    assert np.array_equal(loaded.tables.q_tables, q_learning.tables.q_tables)
+    q_learning.new_run(q_learning.agents)
+    loaded.new_run(loaded.agents)
+    assert np.array_equal(loaded.tables.q_tables, q_learning.tables.q_tables)
+    q_learning.close()
+    loaded.close()
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from benchmarks.benchmark_settings import create_simulation, default_hyperparameters, default_settings
+from code.env_simulation import EnvSimulation, resume_experiment
+
+
+def cartpole_simulation(train_settings, env_copies=1, experiment_path="", parameters=None):
+    # Short cart pole experiment of default settings
+    env_settings, _, parameter_settings, other_settings = default_settings("CartPole-v1")
+    env_settings[0], env_settings[9], env_settings[10] = env_copies, experiment_path, 50
+    for index, value in (parameters or {}).items(): parameter_settings[index] = value
+    return create_simulation("CartPole-v1", env_settings, train_settings, parameter_settings, other_settings)
+
+
+def episode_lengths(env_simulation):
+    # Episode lengths of each run
+    return [metrics["episode_lengths"] for metrics in env_simulation.run_metrics]
+
+
+def run_cartpole(train_settings, env_copies=1):
+    # Run experiment to end
+    env_simulation = cartpole_simulation(train_settings, env_copies)
+    results = env_simulation.run_experiment(default_hyperparameters, train_settings[0], False)
+    # Return results and episode lengths of each run
+    return results, episode_lengths(env_simulation)
+
+
+def test_run_workers_match():
+    # Same runs with one and two run workers
+    results, lengths = run_cartpole([4, 20, 100, 0, 1])
+    worker_results, worker_lengths = run_cartpole([4, 20, 100, 0, 2])
+    # Results and episode lengths do not depend on number of workers
+    assert results == worker_results
+    assert len(lengths) == 4 and all(np.array_equal(*pair) for pair in zip(lengths, worker_lengths))
+
+
+def test_resume_matches_uninterrupted(tmp_path, monkeypatch):
+    # Random Q-tables, eligibility traces, replay and exploration bonus all resume
+    parameters = {4: "Normal", 9: 0.9, 11: 64, 15: 0.5}
+    train_settings = [4, 20, 100, 0, 0]
+    env_simulation = cartpole_simulation(train_settings, 2, parameters=parameters)
+    results = env_simulation.run_experiment(default_hyperparameters, 4, False)
+    lengths = episode_lengths(env_simulation)
+
+    # Crash after third experiment checkpoint
+    path = str(tmp_path / "experiment.pkl")
+    save_experiment = EnvSimulation.save_experiment
+
+    def crashing_save(simulation, *args):
+        save_experiment(simulation, *args)
+        simulation.saves = getattr(simulation, "saves", 0) + 1
+        if simulation.saves == 3: raise KeyboardInterrupt
+
+    monkeypatch.setattr(EnvSimulation, "save_experiment", crashing_save)
+    crashed_simulation = cartpole_simulation(train_settings, 2, path, parameters)
+    with pytest.raises(KeyboardInterrupt):
+        crashed_simulation.run_experiment(default_hyperparameters, 4, False)
+    crashed_simulation.env.close()
+    crashed_simulation.close_agent()
+    monkeypatch.setattr(EnvSimulation, "save_experiment", save_experiment)
+
+    # Keep resumed simulation to compare episode metrics
+    resumed = []
+    run_experiment = EnvSimulation.run_experiment
+
+    def recording_run(simulation, *args):
+        resumed.append(simulation)
+        return run_experiment(simulation, *args)
+
+    monkeypatch.setattr(EnvSimulation, "run_experiment", recording_run)
+    # Resumed experiment finishes like uninterrupted one
+    assert resume_experiment(path) == results
+    resumed_lengths = episode_lengths(resumed[0])
+    assert len(resumed_lengths) == len(lengths)
+    assert all(np.array_equal(*pair) for pair in zip(lengths, resumed_lengths))
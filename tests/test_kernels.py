@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from code.kernels import KERNEL_BACKENDS
+
+# Compiled kernels need numba
+pytestmark = pytest.mark.skipif("Numba" not in KERNEL_BACKENDS, reason="numba is not installed")
+
+
+def test_grid_states_match():
+    # Observations inside and outside state bounds
+    generator = np.random.default_rng(0)
+    obv = generator.uniform(-3, 3, (300, 4))
+    scaling, offset = np.array([1.5, 2.0, 4.0, 0.5]), np.array([-1.0, 2.5, 0.0, 1.0])
+    max_buckets, strides = np.array([5, 6, 9, 3]), np.array([162, 27, 3, 1])
+
+    # Both backends map observations to same states
+    numpy_states = KERNEL_BACKENDS["NumPy"][0](obv, scaling, offset, max_buckets, strides)
+    numba_states = KERNEL_BACKENDS["Numba"][0](obv, scaling, offset, max_buckets, strides)
+    assert np.array_equal(numpy_states, numba_states)
+
+
+def test_td_update_match():
+    # Same random Q-tables for both backends
+    generator = np.random.default_rng(0)
+    num_agents, num_q_table, num_state, num_action = 4, 2, 20, 3
+    initial_tables = generator.uniform(-10, 10, (num_agents, num_q_table, num_state, num_action))
+    q_tables = [initial_tables.copy(), initial_tables.copy()]
+    q_sums = [tables.sum(axis=1) for tables in q_tables]
+    # Each agent has real and mirrored transition in one update
+    agents = np.tile(np.arange(num_agents), 2)
+
+    # Seeded updates of all agents on both backends
+    for _ in range(300):
+        main_table = np.tile(generator.integers(0, num_q_table, num_agents), 2)
+        secondary_table = (main_table + 1) % num_q_table
+        state_0, states = generator.integers(0, num_state, (2, len(agents)))
+        actions = generator.integers(0, num_action, len(agents))
+        rewards = generator.uniform(-1, 1, len(agents))
+        learning_rate, discount_factor = np.full(len(agents), 0.1), np.full(len(agents), 0.99)
+        for backend, tables, q_sum in zip(["NumPy", "Numba"], q_tables, q_sums):
+            KERNEL_BACKENDS[backend][2](tables, q_sum, agents, main_table, secondary_table,
+                                        state_0, states, actions, rewards, learning_rate, discount_factor)
+
+    # Both backends give same Q-tables, Q-table sums and greedy actions
+    assert not np.array_equal(q_tables[0], initial_tables)
+    assert np.array_equal(q_tables[0], q_tables[1])
+    assert np.array_equal(q_sums[0], q_sums[1])
+    states = generator.integers(0, num_state, len(agents))
+    assert np.array_equal(KERNEL_BACKENDS["NumPy"][1](q_sums[0], agents, states),
+                          KERNEL_BACKENDS["Numba"][1](q_sums[1], agents, states))
@@ -0,0 +1,26 @@
+import numpy as np
+
+from code.q_tables import DenseTables, fill_values
+
+
+def test_reset_uses_spare_tables():
+    # Uniform Q-tables of agents with own random streams
+    seed_sequences = np.random.SeedSequence(0).spawn(3)
+    q_tables = DenseTables(3, 2, (5, 3), "Uniform", "Float64", seed_sequences)
+    generator = q_tables.table_generator
+    q_tables.reset([0, 1, 2])
+
+    # Resets in any agent order copy spare Q-tables of that agent
+    for agent in [2, 0, 2, 1]:
+        generator.ready[agent].wait()
+        spare = generator.spares[agent].copy()
+        q_tables.reset([agent])
+        assert np.array_equal(q_tables.q_tables[agent], spare)
+        assert np.allclose(q_tables.q_sum[agent], spare.sum(axis=0))
+    q_tables.close()
+
+    # Spare Q-tables come from agent stream in reset order
+    agent_generator = np.random.default_rng(seed_sequences[2])
+    values = np.empty((2, 5, 3))
+    for _ in range(3): fill_values("Uniform", values, agent_generator)
+    assert np.array_equal(q_tables.q_tables[2], values)